@@ -3,16 +3,40 @@ Lightweight ML Inference Service for GitOps Demo
 A simple sentiment analysis API using rule-based classification
 """
 
+import abc
+import os
 import re
+import sys
+import gc
+import json
+import gzip
+import zlib
+import hashlib
+import hmac
 import time
+import asyncio
 import logging
-from typing import List
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import reduce
+from itertools import repeat
+from operator import or_
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel, Field
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
-from fastapi.responses import Response
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, Gauge, multiprocess
+from prometheus_client.exposition import choose_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # Optional fast serialization path
+    orjson = None
 
 # Logging configuration
 logging.basicConfig(
@@ -22,6 +46,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
+# With several workers (see gunicorn.conf.py) each process writes its samples to
+# PROMETHEUS_MULTIPROC_DIR and /metrics aggregates them across processes
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
 REQUEST_COUNT = Counter(
     'inference_requests_total',
     'Total number of inference requests',
@@ -34,12 +61,181 @@ REQUEST_DURATION = Histogram(
 )
 INFERENCE_DURATION = Histogram(
     'model_inference_duration_seconds',
-    'Model inference duration in seconds'
+    'Model inference duration in seconds',
+    ['model_version']
+)
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds',
+    'How late the event loop woke up from a timed sleep (head-of-line blocking)',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+GC_PAUSE = Histogram(
+    'python_gc_pause_seconds',
+    'Duration of garbage collector runs, by generation',
+    ['generation'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+MODEL_PREDICTIONS = Counter(
+    'model_predictions_total',
+    'Number of texts scored, by the model version that served them',
+    ['model_version']
 )
 ACTIVE_REQUESTS = Gauge(
     'inference_active_requests',
-    'Number of active inference requests'
+    'Number of active inference requests',
+    multiprocess_mode='livesum'
+)
+MODEL_LOAD_DURATION = Gauge(
+    'model_load_duration_seconds',
+    'Time taken to load the sentiment model at startup',
+    multiprocess_mode='max'
+)
+MICRO_BATCH_SIZE = Histogram(
+    'inference_microbatch_size',
+    'Number of single predictions coalesced into one micro-batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+MICRO_BATCH_QUEUE_WAIT = Histogram(
+    'inference_microbatch_queue_wait_seconds',
+    'Time a single prediction waited in the micro-batch queue',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+STAGE_DURATION = Histogram(
+    'inference_stage_duration_seconds',
+    'Time spent in each stage of the inference pipeline',
+    ['stage'],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+METRICS_RENDER_DURATION = Histogram(
+    'metrics_render_duration_seconds',
+    'Time taken to render the /metrics exposition, by format',
+    ['format'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+SHED_REQUESTS = Counter(
+    'inference_requests_shed_total',
+    'Requests rejected by admission control, by reason',
+    ['reason']
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    'inference_admission_queue_depth',
+    'Requests waiting for an admission slot',
+    multiprocess_mode='livesum'
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    'inference_admission_queue_wait_seconds',
+    'Time admitted requests waited for an admission slot',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
 )
+SATURATED = Gauge(
+    'inference_saturated',
+    'Whether /ready reports this worker as saturated (1) or not (0)',
+    multiprocess_mode='livesum'
+)
+AUTOSCALING_REQUEST_RATE = Gauge(
+    'inference_autoscaling_requests_per_second',
+    'Request arrival rate (including shed requests) averaged over the autoscaling window',
+    multiprocess_mode='livesum'
+)
+AUTOSCALING_CONCURRENCY = Gauge(
+    'inference_autoscaling_concurrency',
+    'Requests in flight plus requests waiting for admission',
+    multiprocess_mode='livesum'
+)
+AUTOSCALING_SLO_BURN_RATIO = Gauge(
+    'inference_autoscaling_slo_burn_ratio',
+    'Share of requests over the latency SLO (or shed) divided by the SLO error budget',
+    multiprocess_mode='livemax'
+)
+CACHE_HITS = Counter(
+    'inference_cache_hits_total',
+    'Number of predictions served from the prediction cache'
+)
+CACHE_MISSES = Counter(
+    'inference_cache_misses_total',
+    'Number of predictions not found in the prediction cache'
+)
+CACHE_SIZE = Gauge(
+    'inference_cache_size',
+    'Number of entries in the prediction cache',
+    multiprocess_mode='livesum'
+)
+
+# Inference execution configuration
+INFERENCE_EXECUTOR = os.environ.get('INFERENCE_EXECUTOR', 'thread')  # thread | process | inline
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '4'))
+SIMULATED_LATENCY_SECONDS = float(os.environ.get('SIMULATED_LATENCY_SECONDS', '0.01'))
+
+# Micro-batching of concurrent /predict calls
+MICRO_BATCHING = os.environ.get('MICRO_BATCHING', 'false').lower() == 'true'
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', '32'))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', '5'))
+
+# Serialize prebuilt response payloads with orjson, skipping response model re-validation
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+
+# Report the per-stage breakdown of each prediction in a Server-Timing response header
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'
+
+# Model backend selection: lexicon (rule-based) or linear (hashed bag-of-words, .npz weights)
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'lexicon')
+MODEL_PATH = os.environ.get('MODEL_PATH', '')
+# How often to check MODEL_PATH for a new artifact version (0 disables hot reload)
+MODEL_RELOAD_INTERVAL_SECONDS = float(os.environ.get('MODEL_RELOAD_INTERVAL_SECONDS', '10'))
+
+# Request size limits
+MAX_TEXT_LENGTH = int(os.environ.get('MAX_TEXT_LENGTH', '500'))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '20'))
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '256'))
+# Worst case JSON encoding is 6 bytes per character (\uXXXX) plus the object wrapper
+_MAX_STREAM_LINE_BYTES = MAX_TEXT_LENGTH * 6 + 1024
+
+# On-demand sampling profiler at /debug/profile (disabled unless DEBUG_PROFILING=true
+# and DEBUG_PROFILING_TOKEN is set)
+DEBUG_PROFILING = os.environ.get('DEBUG_PROFILING', 'false').lower() == 'true'
+DEBUG_PROFILING_TOKEN = os.environ.get('DEBUG_PROFILING_TOKEN', '')
+if DEBUG_PROFILING and not DEBUG_PROFILING_TOKEN:
+    logger.warning("DEBUG_PROFILING is set without DEBUG_PROFILING_TOKEN; /debug/profile stays disabled")
+MAX_PROFILE_SECONDS = float(os.environ.get('MAX_PROFILE_SECONDS', '60'))
+
+# Admission control: at most MAX_IN_FLIGHT_REQUESTS requests are served at once (0 disables it);
+# up to ADMISSION_QUEUE_SIZE more wait up to ADMISSION_QUEUE_TIMEOUT_MS for a slot
+MAX_IN_FLIGHT_REQUESTS = int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', '64'))
+ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', '64'))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', '1000'))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', '1'))
+# Probes and scrapes must keep working when the service is saturated
+ADMISSION_EXEMPT_PATHS = frozenset({'/health', '/ready', '/metrics', '/metrics/autoscaling'})
+# Only inference requests are demand for the autoscaling signals; docs, debug endpoints
+# and 404s still go through admission but do not move the rate or the SLO burn
+AUTOSCALING_PATHS = frozenset({'/predict', '/predict/batch', '/predict/stream'})
+
+# Saturation-aware readiness: /ready fails while any signal is at its limit (0 disables a
+# signal) and passes again once all are below limit * READINESS_RECOVERY_RATIO
+ADAPTIVE_READINESS = os.environ.get('ADAPTIVE_READINESS', 'true').lower() == 'true'
+READINESS_MAX_IN_FLIGHT = int(os.environ.get('READINESS_MAX_IN_FLIGHT', str(MAX_IN_FLIGHT_REQUESTS)))
+READINESS_MAX_QUEUE_DEPTH = int(os.environ.get('READINESS_MAX_QUEUE_DEPTH', '16'))
+READINESS_MAX_LOOP_LAG_MS = float(os.environ.get('READINESS_MAX_LOOP_LAG_MS', '200'))
+READINESS_MAX_P95_MS = float(os.environ.get('READINESS_MAX_P95_MS', '1000'))
+READINESS_RECOVERY_RATIO = float(os.environ.get('READINESS_RECOVERY_RATIO', '0.8'))
+READINESS_LATENCY_WINDOW_SECONDS = float(os.environ.get('READINESS_LATENCY_WINDOW_SECONDS', '30'))
+LOOP_LAG_INTERVAL_SECONDS = float(os.environ.get('LOOP_LAG_INTERVAL_SECONDS', '0.1'))
+# Log a warning when one lag sample exceeds this (0 disables), at most every 10 seconds
+LOOP_LAG_WARN_MS = float(os.environ.get('LOOP_LAG_WARN_MS', '0'))
+GC_MONITORING = os.environ.get('GC_MONITORING', 'true').lower() == 'true'
+
+# Autoscaling signals: rate and latency SLO burn over a rolling window of one-second buckets.
+# A burn ratio of 1 means requests miss SLO_LATENCY_MS exactly as often as SLO_TARGET allows
+AUTOSCALING_WINDOW_SECONDS = int(os.environ.get('AUTOSCALING_WINDOW_SECONDS', '60'))
+SLO_LATENCY_MS = float(os.environ.get('SLO_LATENCY_MS', '250'))
+SLO_TARGET = float(os.environ.get('SLO_TARGET', '0.99'))
+
+# How long a rendered /metrics exposition is reused (0 renders on every scrape)
+METRICS_CACHE_SECONDS = float(os.environ.get('METRICS_CACHE_SECONDS', '1'))
+
+# Prediction cache (size 0 disables it, TTL 0 means entries never expire)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '1024'))
+PREDICTION_CACHE_TTL_SECONDS = float(os.environ.get('PREDICTION_CACHE_TTL_SECONDS', '0'))
 
 # Create FastAPI app
 app = FastAPI(
@@ -61,9 +257,86 @@ NEGATIVE_WORDS = {
     'useless', 'pathetic', 'disgusting', 'miserable', 'dreadful'
 }
 
+# Merged word -> polarity table (+1 positive, -1 negative)
+LEXICON: Dict[str, int] = {
+    **{word: 1 for word in POSITIVE_WORDS},
+    **{word: -1 for word in NEGATIVE_WORDS},
+}
+
+_WORD_PATTERN = re.compile(r'\b[a-z]+\b')
+# For lowercased ASCII text, \w is [a-z0-9_]; every other byte becomes a separator
+_WORD_BYTES = b'abcdefghijklmnopqrstuvwxyz0123456789_'
+_SEPARATOR_TABLE = bytes(b if b in _WORD_BYTES else 0x20 for b in range(256))
+
+
+class CompiledLexicon:
+    """
+    Scoring tables derived from a word -> polarity table.
+    Each word gets its own bit (single-text scoring folds matches into one int)
+    and the matching column (batch scoring builds a presence matrix).
+    """
+
+    # Documents are joined with a sentinel token that maps to an extra column
+    DOC_SEPARATOR = b'\x00'
+
+    def __init__(self, lexicon: Dict[str, int]):
+        self.lexicon = lexicon
+        self.bits = {}
+        self.positive_mask = self.negative_mask = 0
+        for i, word in enumerate(sorted(lexicon)):
+            bit = 1 << i
+            self.bits[word.encode('ascii')] = bit
+            if lexicon[word] > 0:
+                self.positive_mask |= bit
+            else:
+                self.negative_mask |= bit
+
+        # Column layout for batch scoring: column i holds the word with bit 1 << i
+        self.size = len(lexicon)
+        self.columns = {word: bit.bit_length() - 1 for word, bit in self.bits.items()}
+        self.positive_columns = np.array(
+            [lexicon[word] > 0 for word in sorted(lexicon)], dtype=bool
+        )
+        self.batch_columns = {**self.columns, self.DOC_SEPARATOR: self.size}
+        # Computed with the same float arithmetic as analyze_sentiment
+        self.polar_confidence = np.array(
+            [round(min(0.95, 0.6 + (k * 0.1)), 2) for k in range(self.size + 1)]
+        )
+
+
+DEFAULT_LEXICON = CompiledLexicon(LEXICON)
+_NEUTRAL_CONFIDENCE = [round(min(0.5 + (k * 0.01), 0.95), 2) for k in range(46)]
+
+
+def _token_bytes(text: str) -> bytes:
+    """
+    Lowercase text and reduce it to space-separated word characters.
+    ASCII text is mapped with a byte translation table; tokens that contain
+    digits or underscores are kept but never match the lexicon, mirroring
+    the word boundaries of _WORD_PATTERN. Other text falls back to the regex.
+    """
+    text_lower = text.lower()
+    if text_lower.isascii():
+        return text_lower.encode('ascii').translate(_SEPARATOR_TABLE)
+    return ' '.join(_WORD_PATTERN.findall(text_lower)).encode('ascii')
+
+
+def _tokenize(text: str) -> list:
+    """Split text into lowercase word tokens (as bytes)."""
+    return _token_bytes(text).split()
+
+
+def _letter_tokens(text: str) -> list:
+    """
+    Lowercase tokens made only of letters, as bytes. Unlike _tokenize, the result
+    does not depend on whether text is ASCII: tokens with digits or underscores
+    are dropped on both paths, as the regex fallback does.
+    """
+    return [token for token in _token_bytes(text).split() if token.isalpha()]
+
 
 class PredictionRequest(BaseModel):
-    text: str = Field(..., min_length=1, max_length=500, description="Text to analyze")
+    text: str = Field(..., min_length=1, max_length=MAX_TEXT_LENGTH, description="Text to analyze")
 
     class Config:
         json_schema_extra = {
@@ -79,10 +352,14 @@ class PredictionResponse(BaseModel):
     confidence: float
     processing_time_ms: float
     timestamp: str
+    model_version: str
+
+    class Config:
+        protected_namespaces = ()
 
 
 class BatchPredictionRequest(BaseModel):
-    texts: List[str] = Field(..., min_items=1, max_items=20)
+    texts: List[str] = Field(..., min_items=1, max_items=MAX_BATCH_SIZE)
 
 
 class BatchPredictionResponse(BaseModel):
@@ -107,17 +384,17 @@ def _health_response(status: str) -> HealthResponse:
     )
 
 
-def analyze_sentiment(text: str) -> tuple:
+def analyze_sentiment(text: str, lexicon: CompiledLexicon = DEFAULT_LEXICON) -> tuple:
     """
     Simple rule-based sentiment analysis
     Returns: (sentiment, confidence)
     """
-    text_lower = text.lower()
-    # Extract only alphabetic words, removing punctuation
-    words = set(re.findall(r'\b[a-z]+\b', text_lower))
+    words = _tokenize(text)
+    # Single pass: OR together the bit of every lexicon word seen
+    matched = reduce(or_, map(lexicon.bits.get, words, repeat(0)), 0)
 
-    positive_count = len(words & POSITIVE_WORDS)
-    negative_count = len(words & NEGATIVE_WORDS)
+    positive_count = (matched & lexicon.positive_mask).bit_count()
+    negative_count = (matched & lexicon.negative_mask).bit_count()
 
     if positive_count > negative_count:
         sentiment = "positive"
@@ -127,12 +404,1131 @@ def analyze_sentiment(text: str) -> tuple:
         confidence = min(0.95, 0.6 + (negative_count * 0.1))
     else:
         sentiment = "neutral"
-        confidence = 0.5 + (len(words) * 0.01)
+        confidence = 0.5 + (len({word for word in words if word.isalpha()}) * 0.01)
 
     confidence = min(confidence, 0.95)
     return sentiment, round(confidence, 2)
 
 
+def analyze_sentiment_batch(texts: List[str], lexicon: CompiledLexicon = DEFAULT_LEXICON) -> List[tuple]:
+    """
+    Vectorized rule-based sentiment analysis for a list of texts
+    Returns: [(sentiment, confidence), ...] identical to analyze_sentiment per text
+    """
+    if not texts:
+        return []
+
+    docs = [_token_bytes(text) for text in texts]
+    tokens = (b' ' + lexicon.DOC_SEPARATOR + b' ').join(docs).split()
+    columns = np.fromiter(
+        map(lexicon.batch_columns.get, tokens, repeat(-1)), dtype=np.intp, count=len(tokens)
+    )
+    separator = lexicon.size
+    doc_ids = np.cumsum(columns == separator)
+    hits = (columns >= 0) & (columns != separator)
+
+    # Presence matrix gives set semantics: repeated words count once
+    presence = np.zeros((len(texts), lexicon.size), dtype=bool)
+    presence[doc_ids[hits], columns[hits]] = True
+    positive_counts = presence[:, lexicon.positive_columns].sum(axis=1)
+    negative_counts = presence[:, ~lexicon.positive_columns].sum(axis=1)
+
+    directions = np.sign(positive_counts - negative_counts).tolist()
+    confidences = lexicon.polar_confidence[np.maximum(positive_counts, negative_counts)].tolist()
+
+    results = []
+    for i, direction in enumerate(directions):
+        if direction > 0:
+            results.append(("positive", confidences[i]))
+        elif direction < 0:
+            results.append(("negative", confidences[i]))
+        else:
+            unique_words = len({word for word in docs[i].split() if word.isalpha()})
+            results.append(("neutral", _NEUTRAL_CONFIDENCE[min(unique_words, 45)]))
+    return results
+
+
+class SentimentModel(abc.ABC):
+    """
+    Interface for sentiment model backends used by the endpoints.
+    Implementations return (sentiment, confidence) tuples.
+    """
+
+    name = "base"
+
+    def predict(self, text: str) -> tuple:
+        """Score a single text."""
+        return self.predict_batch([text])[0]
+
+    @abc.abstractmethod
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        """Score a list of texts, preserving order."""
+
+
+def _load_arrays(path: str, names: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Load named arrays from a model artifact.
+    A directory of <name>.npy files is memory-mapped read-only, so worker
+    processes share the page cache and nothing is parsed or copied at startup.
+    An .npz file is read into memory.
+    """
+    path = os.fspath(path)
+    if os.path.isdir(path):
+        return {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in names
+            if os.path.exists(os.path.join(path, f"{name}.npy"))
+        }
+    with np.load(path) as data:
+        return {name: data[name] for name in names if name in data}
+
+
+def _save_arrays(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Write arrays as an .npz file, or as a memory-mappable directory of .npy files."""
+    path = os.fspath(path)
+    if path.endswith('.npz'):
+        np.savez(path, **arrays)
+        return
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+
+class LexiconModel(SentimentModel):
+    """Rule-based lexicon scorer (analyze_sentiment / analyze_sentiment_batch)."""
+
+    name = "lexicon"
+
+    def __init__(self, lexicon: CompiledLexicon = DEFAULT_LEXICON):
+        self.lexicon = lexicon
+
+    @classmethod
+    def load(cls, path: str) -> "LexiconModel":
+        """Load a lexicon artifact: words (fixed-width bytes) and polarity (int8) arrays."""
+        arrays = _load_arrays(path, ["words", "polarity"])
+        lexicon = {
+            word.decode('ascii'): int(polarity)
+            for word, polarity in zip(arrays["words"].tolist(), arrays["polarity"].tolist())
+        }
+        return cls(CompiledLexicon(lexicon))
+
+    def save(self, path: str) -> None:
+        """Write the lexicon as an artifact readable by load()."""
+        words = sorted(self.lexicon.lexicon)
+        _save_arrays(path, {
+            "words": np.array([word.encode('ascii') for word in words]),
+            "polarity": np.array([self.lexicon.lexicon[word] for word in words], dtype=np.int8),
+        })
+
+    def predict(self, text: str) -> tuple:
+        return analyze_sentiment(text, self.lexicon)
+
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        return analyze_sentiment_batch(texts, self.lexicon)
+
+
+class HashedLinearModel(SentimentModel):
+    """
+    Logistic regression over a hashed bag of words.
+    Tokens are hashed with CRC32 (stable across processes) into len(weights)
+    buckets; a batch is scored with one sparse matrix-vector product.
+    Texts whose positive probability lies within neutral_margin of 0.5 are neutral.
+    """
+
+    name = "linear"
+
+    def __init__(self, weights: np.ndarray, bias: float = 0.0, neutral_margin: float = 0.1):
+        # asanyarray keeps a float32 memmap as-is instead of copying it
+        self.weights = np.asanyarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.neutral_margin = float(neutral_margin)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearModel":
+        """Load weights, bias and neutral_margin from an .npz file or .npy directory."""
+        arrays = _load_arrays(path, ["weights", "bias", "neutral_margin"])
+        return cls(
+            weights=arrays["weights"],
+            bias=float(arrays["bias"]) if "bias" in arrays else 0.0,
+            neutral_margin=float(arrays["neutral_margin"]) if "neutral_margin" in arrays else 0.1
+        )
+
+    @classmethod
+    def from_lexicon(cls, lexicon: Dict[str, int], n_features: int = 4096,
+                     weight: float = 2.0) -> "HashedLinearModel":
+        """Seed weights from a word -> polarity table, e.g. to bootstrap a model file."""
+        weights = np.zeros(n_features, dtype=np.float32)
+        for word, polarity in lexicon.items():
+            weights[zlib.crc32(word.encode('ascii')) % n_features] += weight * polarity
+        return cls(weights)
+
+    def save(self, path: str) -> None:
+        """Write the model as an artifact readable by load()."""
+        _save_arrays(path, {
+            "weights": self.weights,
+            "bias": np.float64(self.bias),
+            "neutral_margin": np.float64(self.neutral_margin),
+        })
+
+    def probabilities(self, texts: List[str]) -> np.ndarray:
+        """Positive-class probability for each text."""
+        token_lists = [_letter_tokens(text) for text in texts]
+        lengths = [len(tokens) for tokens in token_lists]
+        columns = np.fromiter(
+            map(zlib.crc32, (token for tokens in token_lists for token in tokens)),
+            dtype=np.int64, count=sum(lengths)
+        ) % len(self.weights)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        # Sparse (rows x columns, value 1) bag-of-words matrix times the weight vector
+        logits = np.bincount(rows, weights=self.weights[columns], minlength=len(texts)) + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        results = []
+        for p in self.probabilities(texts).tolist():
+            if p > 0.5 + self.neutral_margin:
+                results.append(("positive", round(p, 2)))
+            elif p < 0.5 - self.neutral_margin:
+                results.append(("negative", round(1.0 - p, 2)))
+            else:
+                results.append(("neutral", round(1.0 - abs(p - 0.5) * 2, 2)))
+        return results
+
+
+MODEL_BACKENDS = {
+    LexiconModel.name: LexiconModel,
+    HashedLinearModel.name: HashedLinearModel,
+}
+
+
+def load_model(backend: str, path: Optional[str] = None) -> SentimentModel:
+    """Create the configured model backend (the lexicon backend defaults to the built-in words)."""
+    if backend == LexiconModel.name:
+        return LexiconModel.load(path) if path else LexiconModel()
+    if backend == HashedLinearModel.name:
+        if not path:
+            raise ValueError("MODEL_PATH is required for the linear backend")
+        return HashedLinearModel.load(path)
+    raise ValueError(f"Unknown MODEL_BACKEND: {backend} (expected one of {sorted(MODEL_BACKENDS)})")
+
+
+class ModelRegistry:
+    """
+    Holds the active (model, version) pair and hot-reloads it from the artifact path.
+    New versions are loaded on a background thread and published with a single
+    reference assignment, so a request that captured the pair keeps its version
+    until it finishes. The version is the artifact's VERSION file, or a digest
+    of its file names, sizes and mtimes. load_error holds the last load failure
+    while no model is active; a broken artifact is retried until one loads, and
+    after that only when it changes.
+    """
+
+    def __init__(self, backend: str, path: str, reload_interval: float):
+        self.backend = backend
+        self.path = path
+        self.reload_interval = reload_interval
+        self._active: Optional[tuple] = None
+        self._signature: Optional[tuple] = None
+        self._failed_signature: Optional[tuple] = None
+        self.load_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> Optional[tuple]:
+        """The current (model, version) pair, or None before the first load."""
+        return self._active
+
+    def activate(self, model: SentimentModel, version: str) -> None:
+        """Publish a model version for new requests."""
+        self._active = (model, version)
+        logger.info(f"Activated sentiment model {model.name} version {version}")
+
+    def ensure_loaded(self) -> tuple:
+        """Load the model once; concurrent callers wait for the first load."""
+        if self._active is None:
+            with self._lock:
+                if self._active is None:
+                    self._load()
+        return self._active
+
+    def check_for_update(self) -> bool:
+        """Load and activate the artifact if it changed; the current version is kept on failure."""
+        with self._lock:
+            try:
+                return self._load()
+            except Exception as e:
+                if self._active is None:
+                    logger.error(f"Model load failed, no version active: {e}")
+                else:
+                    logger.error(f"Model reload failed, keeping version {self._active[1]}: {e}")
+                return False
+
+    def _resolve_path(self) -> str:
+        """ConfigMap volumes publish updates by atomically swapping the ..data symlink."""
+        data_dir = os.path.join(self.path, '..data')
+        return os.path.realpath(data_dir if os.path.isdir(data_dir) else self.path)
+
+    @staticmethod
+    def _signature_of(path: str) -> tuple:
+        if os.path.isdir(path):
+            return (path,) + tuple(sorted(
+                (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in os.scandir(path) if entry.is_file()
+            ))
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _version_of(path: str, signature: tuple) -> str:
+        version_file = os.path.join(path, 'VERSION')
+        if os.path.isfile(version_file):
+            with open(version_file) as f:
+                return f.read().strip()
+        return hashlib.sha1(repr(signature[1:]).encode()).hexdigest()[:12]
+
+    def _load(self) -> bool:
+        if not self.path:
+            if self._active is not None:
+                return False
+            resolved, version = None, "builtin"
+        else:
+            resolved = self._resolve_path()
+            signature = self._signature_of(resolved)
+            if signature == self._signature:
+                return False
+            # Once a version is serving, a broken artifact is not retried until it changes
+            if self._active is not None and signature == self._failed_signature:
+                return False
+            version = self._version_of(resolved, signature)
+
+        start_time = time.perf_counter()
+        try:
+            model = load_model(self.backend, resolved)
+        except Exception as e:
+            if resolved is not None:
+                self._failed_signature = signature
+            if self._active is None:
+                self.load_error = str(e)
+            raise
+        if resolved is not None:
+            self._signature = signature
+        self._failed_signature = None
+        self.load_error = None
+        duration = time.perf_counter() - start_time
+        MODEL_LOAD_DURATION.set(duration)
+        logger.info(f"Loaded sentiment model {model.name} version {version} in {duration * 1000:.1f} ms")
+        self.activate(model, version)
+        return True
+
+    def start_watching(self) -> None:
+        """Poll the artifact path for new versions in a daemon thread."""
+        if not self.path or self.reload_interval <= 0 or self._watcher is not None:
+            return
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    @property
+    def watching(self) -> bool:
+        return self._watcher is not None
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        self._watcher = None
+
+    def _watch(self) -> None:
+        stop = self._stop
+        while not stop.wait(self.reload_interval):
+            self.check_for_update()
+
+
+# Loaded after the server starts (see start_model_loading) so /ready can report progress
+MODEL_REGISTRY = ModelRegistry(MODEL_BACKEND, MODEL_PATH, MODEL_RELOAD_INTERVAL_SECONDS)
+
+
+async def _active_model() -> tuple:
+    """
+    (model, version) to use for a request, waiting off the event loop for the first load.
+    Raises 503 while no model can be loaded; the watcher keeps retrying in the background.
+    """
+    active = MODEL_REGISTRY.active
+    if active is None:
+        if MODEL_REGISTRY.load_error is not None and MODEL_REGISTRY.watching:
+            raise HTTPException(status_code=503, detail="Model is not available")
+        try:
+            active = await asyncio.get_running_loop().run_in_executor(None, MODEL_REGISTRY.ensure_loaded)
+        except Exception:
+            raise HTTPException(status_code=503, detail="Model is not available")
+    return active
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of (sentiment, confidence) results keyed by model version
+    and normalized text.
+    Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = 0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Scoring is case-insensitive and ignores surrounding whitespace."""
+        return text.strip().lower()
+
+    def get(self, text: str, version: str = '') -> Optional[tuple]:
+        """Return the cached result for text under a model version, or None on a miss."""
+        if self.max_size <= 0:
+            return None
+        key = (version, self.normalize(text))
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, expires_at = entry
+            if expires_at is None or time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                CACHE_HITS.inc()
+                return result
+            del self._entries[key]
+            CACHE_SIZE.set(len(self._entries))
+        CACHE_MISSES.inc()
+        return None
+
+    def put(self, text: str, result: tuple, version: str = '') -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        key = (version, self.normalize(text))
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        CACHE_SIZE.set(len(self._entries))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        CACHE_SIZE.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+PREDICTION_CACHE = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SECONDS)
+
+
+class StageTimer:
+    """
+    Splits one request's latency into consecutive pipeline stages.
+    lap() charges the time since the previous lap to a stage, so timing a
+    stage costs one clock read. Stages: parse (body read, JSON decoding and
+    pydantic validation), cache, queue (waiting for an executor worker),
+    score (tokenization and scoring in the worker), simulated_latency,
+    microbatch (queueing and scoring in a shared micro-batch) and serialize.
+    """
+
+    __slots__ = ('started', 'stages', '_last')
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def lap(self, stage: str, exclude: float = 0.0) -> None:
+        """Charge the time since the last lap, minus exclude, to stage."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last - exclude
+        self._last = now
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Charge time measured elsewhere (e.g. in a worker) to stage."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Format the stages as a Server-Timing header value (milliseconds)."""
+        entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={(self._last - self.started) * 1000:.3f}")
+        return ", ".join(entries)
+
+
+# The timer of the request being handled (None outside StageTimingMiddleware)
+_STAGE_TIMER: ContextVar[Optional[StageTimer]] = ContextVar('stage_timer', default=None)
+
+
+class StageTimingMiddleware:
+    """
+    Starts a StageTimer when a request arrives and, when the response starts,
+    charges the remaining time to serialize, records each stage in
+    inference_stage_duration_seconds and optionally adds a Server-Timing header.
+    Requests whose handler recorded no stages (health, metrics) are left alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        token = _STAGE_TIMER.set(timer)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timer.stages:
+                timer.lap('serialize')
+                for stage, seconds in timer.stages.items():
+                    STAGE_DURATION.labels(stage=stage).observe(seconds)
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timer.server_timing().encode('latin-1')))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _STAGE_TIMER.reset(token)
+
+
+app.add_middleware(StageTimingMiddleware)
+
+
+class AdmissionController:
+    """
+    Bounds concurrent requests, with a bounded FIFO queue in front.
+    acquire() returns None once the request holds a slot, or the status to shed
+    it with: 429 when the queue is full, 503 when the queue wait times out.
+    A released slot is handed straight to the oldest waiter. Waiters are plain
+    futures, so the controller is not tied to one event loop.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[int]:
+        """Take a slot, waiting in the queue if needed; return a status code if shed."""
+        if self.max_in_flight <= 0 or (self.in_flight < self.max_in_flight and not self._waiters):
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            SHED_REQUESTS.labels(reason='queue_full').inc()
+            return 429
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.inc()
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if self._leave_queue(waiter):
+                self.release()  # Handed a slot, but the request is gone
+            raise
+        if self._leave_queue(waiter):
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+            return None
+        SHED_REQUESTS.labels(reason='queue_timeout').inc()
+        return 503
+
+    def _leave_queue(self, waiter: asyncio.Future) -> bool:
+        """Remove waiter from the queue; True if it was already handed a slot."""
+        ADMISSION_QUEUE_DEPTH.dec()
+        if waiter.done() and not waiter.cancelled():
+            return True
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        return False
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest live waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+ADMISSION_CONTROLLER = AdmissionController(
+    MAX_IN_FLIGHT_REQUESTS, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS / 1000
+)
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds requests beyond ADMISSION_CONTROLLER's capacity with a fast 429/503
+    and Retry-After, instead of letting latency grow until probes fail.
+    Paths in ADMISSION_EXEMPT_PATHS bypass admission. A slot is held until the
+    response (including a streamed body) has been sent. Requests to
+    AUTOSCALING_PATHS, shed or served, are observed by AUTOSCALING_SIGNALS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in ADMISSION_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        observed = scope["path"] in AUTOSCALING_PATHS
+        arrived = time.perf_counter()
+        status = await ADMISSION_CONTROLLER.acquire()
+        if status is not None:
+            if observed:
+                AUTOSCALING_SIGNALS.observe(time.perf_counter() - arrived, shed=True)
+            response = JSONResponse(
+                status_code=status,
+                content={"detail": "Server overloaded, retry later"},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ADMISSION_CONTROLLER.release()
+            if observed:
+                AUTOSCALING_SIGNALS.observe(time.perf_counter() - arrived)
+
+
+# Added last so it runs first: shed requests never reach the stage timer or handlers
+app.add_middleware(AdmissionControlMiddleware)
+
+
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Optional[Executor]:
+    """Lazily create the pool used for CPU-bound scoring (None means inline)."""
+    global _executor
+    if _executor is None and INFERENCE_EXECUTOR != 'inline':
+        if INFERENCE_EXECUTOR == 'process':
+            _executor = ProcessPoolExecutor(max_workers=INFERENCE_WORKERS)
+        elif INFERENCE_EXECUTOR == 'thread':
+            _executor = ThreadPoolExecutor(
+                max_workers=INFERENCE_WORKERS,
+                thread_name_prefix='inference'
+            )
+        else:
+            raise ValueError(f"Unknown INFERENCE_EXECUTOR: {INFERENCE_EXECUTOR}")
+    return _executor
+
+
+def _timed_call(fn, arg) -> tuple:
+    """Call fn in a worker and return (result, seconds spent in fn)."""
+    started = time.perf_counter()
+    result = fn(arg)
+    return result, time.perf_counter() - started
+
+
+async def _score(fn, arg):
+    """Run a scoring function on the configured executor (or inline)."""
+    executor = _get_executor()
+    timer = _STAGE_TIMER.get()
+    if executor is None:
+        result = fn(arg)
+        if timer is not None:
+            timer.lap('score')
+        return result
+    loop = asyncio.get_running_loop()
+    if timer is None:
+        return await loop.run_in_executor(executor, fn, arg)
+    result, elapsed = await loop.run_in_executor(executor, _timed_call, fn, arg)
+    timer.lap('queue', exclude=elapsed)
+    timer.add('score', elapsed)
+    return result
+
+
+async def run_inference(text: str, model: SentimentModel) -> tuple:
+    """
+    Score text without blocking the event loop.
+    Scoring runs on the configured executor; simulated model latency is awaited.
+    """
+    result = await _score(model.predict, text)
+
+    if SIMULATED_LATENCY_SECONDS > 0:
+        await asyncio.sleep(SIMULATED_LATENCY_SECONDS)  # Simulate model inference time
+        timer = _STAGE_TIMER.get()
+        if timer is not None:
+            timer.lap('simulated_latency')
+    return result
+
+
+def _json_response(content: dict) -> Response:
+    """Serialize an already-typed payload directly, with orjson when enabled and installed."""
+    if FAST_JSON_RESPONSES and orjson is not None:
+        return ORJSONResponse(content=content)
+    return JSONResponse(content=content)
+
+
+def _dump_json_line(content: dict) -> bytes:
+    """Encode one NDJSON line (without the newline)."""
+    if FAST_JSON_RESPONSES and orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content).encode('utf-8')
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response that leaves the request body to the endpoint.
+    StreamingResponse listens for disconnects by consuming receive(), which
+    would swallow request body chunks still being streamed in.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _read_ndjson_lines(request: Request) -> AsyncIterator[Optional[bytes]]:
+    """
+    Yield request body lines as they arrive, holding at most one partial line.
+    Lines longer than _MAX_STREAM_LINE_BYTES are discarded and yielded as None.
+    """
+    buffer = b''
+    oversized = False
+    async for chunk in request.stream():
+        lines = (buffer + chunk).split(b'\n')
+        buffer = lines.pop()
+        for line in lines:
+            yield None if oversized or len(line) > _MAX_STREAM_LINE_BYTES else line
+            oversized = False
+        if len(buffer) > _MAX_STREAM_LINE_BYTES:
+            buffer, oversized = b'', True
+    if buffer or oversized:
+        yield None if oversized else buffer
+
+
+def _parse_stream_line(line: Optional[bytes]) -> str:
+    """Extract the text from one NDJSON request line, raising ValueError if invalid."""
+    if line is None:
+        raise ValueError("Line too long")
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+    text = item.get("text") if isinstance(item, dict) else None
+    if not isinstance(text, str):
+        raise ValueError("Expected an object with a 'text' string")
+    if not 1 <= len(text) <= MAX_TEXT_LENGTH:
+        raise ValueError(f"Text must be between 1 and {MAX_TEXT_LENGTH} characters")
+    return text
+
+
+async def _score_stream_chunk(pending: list, model: SentimentModel, version: str) -> bytes:
+    """Score a chunk of (line number, text or error) entries and encode them as NDJSON."""
+    start_time = time.time()
+    texts = [entry for _, entry in pending if isinstance(entry, str)]
+    with INFERENCE_DURATION.labels(model_version=version).time():
+        results = iter(await _score(model.predict_batch, texts))
+    MODEL_PREDICTIONS.labels(model_version=version).inc(len(texts))
+
+    per_text_time = round((time.time() - start_time) * 1000 / max(len(texts), 1), 2)
+    timestamp = datetime.utcnow().isoformat()
+    out = []
+    for line_number, entry in pending:
+        if isinstance(entry, str):
+            sentiment, confidence = next(results)
+            out.append(_dump_json_line({
+                "text": entry,
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "processing_time_ms": per_text_time,
+                "timestamp": timestamp,
+                "model_version": version
+            }))
+        else:
+            out.append(_dump_json_line({"line": line_number, "error": str(entry)}))
+    return b'\n'.join(out) + b'\n'
+
+
+async def _stream_predictions(request: Request, model: SentimentModel, version: str) -> AsyncIterator[bytes]:
+    """Score NDJSON request lines in chunks of STREAM_CHUNK_SIZE, preserving input order."""
+    ACTIVE_REQUESTS.inc()
+    start_time = time.time()
+    pending = []
+    line_number = 0
+
+    try:
+        async for line in _read_ndjson_lines(request):
+            line_number += 1
+            if line is not None and not line.strip():
+                continue
+            try:
+                pending.append((line_number, _parse_stream_line(line)))
+            except ValueError as e:
+                pending.append((line_number, e))
+            if len(pending) >= STREAM_CHUNK_SIZE:
+                yield await _score_stream_chunk(pending, model, version)
+                pending = []
+        if pending:
+            yield await _score_stream_chunk(pending, model, version)
+
+        REQUEST_COUNT.labels(endpoint='stream', status='success').inc()
+        REQUEST_DURATION.labels(endpoint='stream').observe(time.time() - start_time)
+
+    except Exception as e:
+        REQUEST_COUNT.labels(endpoint='stream', status='error').inc()
+        logger.error(f"Stream prediction failed: {e}", exc_info=True)
+        raise
+
+    finally:
+        ACTIVE_REQUESTS.dec()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single predictions into one batch scoring call.
+    A batch is flushed when it reaches max_batch_size or when the oldest
+    queued prediction has waited max_wait_seconds; the whole batch then
+    shares one simulated inference delay. A batch only holds predictions
+    for one model, so a model swap flushes the pending batch early.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_seconds: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, text: str, model: SentimentModel) -> tuple:
+        """Queue text for the next batch and wait for its (sentiment, confidence)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._pending and self._pending[0][1] is not model:
+            self._flush()
+        self._pending.append((text, model, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list) -> None:
+        # The task inherits the context of whichever request triggered the flush;
+        # shared batch work is charged to each request's microbatch stage instead
+        _STAGE_TIMER.set(None)
+        flushed_at = time.perf_counter()
+        MICRO_BATCH_SIZE.observe(len(batch))
+        for _, _, _, enqueued_at in batch:
+            MICRO_BATCH_QUEUE_WAIT.observe(flushed_at - enqueued_at)
+
+        model = batch[0][1]
+        try:
+            results = await _score(model.predict_batch, [text for text, _, _, _ in batch])
+            if SIMULATED_LATENCY_SECONDS > 0:
+                await asyncio.sleep(SIMULATED_LATENCY_SECONDS)  # Simulate model inference time
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+MICRO_BATCHER = MicroBatcher(MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS / 1000)
+
+
+class SaturationMonitor:
+    """
+    Decides whether this worker should take new traffic.
+    Signals are admitted in-flight requests, admission queue depth, smoothed
+    event-loop lag and the p95 of request latencies from the last window_seconds.
+    The worker becomes saturated when any signal reaches its limit and recovers
+    only when every signal is below limit * recovery_ratio, so /ready does not
+    flap around a threshold. Latency samples expire, so a pod that stops
+    receiving traffic while unready still recovers.
+    """
+
+    def __init__(self, limits: Dict[str, float], recovery_ratio: float, window_seconds: float):
+        self.limits = limits
+        self.recovery_ratio = recovery_ratio
+        self.window_seconds = window_seconds
+        self.saturated = False
+        self.loop_lag = 0.0
+        self._latencies: deque = deque(maxlen=4096)  # (monotonic time, seconds)
+
+    def observe_latency(self, seconds: float) -> None:
+        """Record a completed request's latency."""
+        self._latencies.append((time.monotonic(), seconds))
+
+    def observe_loop_lag(self, seconds: float) -> None:
+        """Fold one event-loop lag sample into the smoothed value."""
+        self.loop_lag += 0.2 * (seconds - self.loop_lag)
+
+    def p95(self) -> float:
+        """p95 latency over the window (0 without recent requests)."""
+        cutoff = time.monotonic() - self.window_seconds
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(seconds for _, seconds in self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def signals(self) -> Dict[str, float]:
+        return {
+            'in_flight': ADMISSION_CONTROLLER.in_flight,
+            'queue_depth': ADMISSION_CONTROLLER.queue_depth,
+            'loop_lag_ms': round(self.loop_lag * 1000, 3),
+            'p95_ms': round(self.p95() * 1000, 3),
+        }
+
+    def check(self) -> tuple:
+        """Re-evaluate saturation; returns (saturated, signals, signals over their limit)."""
+        signals = self.signals()
+        ratio = self.recovery_ratio if self.saturated else 1.0
+        over = [
+            name for name, value in signals.items()
+            if self.limits.get(name, 0) > 0 and value >= self.limits[name] * ratio
+        ]
+        saturated = bool(over)
+        if saturated != self.saturated:
+            self.saturated = saturated
+            SATURATED.set(1 if saturated else 0)
+            if saturated:
+                logger.warning(f"Worker saturated, failing readiness: {over} {signals}")
+            else:
+                logger.info(f"Worker recovered, passing readiness: {signals}")
+        return saturated, signals, over
+
+
+SATURATION_MONITOR = SaturationMonitor(
+    limits={
+        'in_flight': READINESS_MAX_IN_FLIGHT,
+        'queue_depth': READINESS_MAX_QUEUE_DEPTH,
+        'loop_lag_ms': READINESS_MAX_LOOP_LAG_MS,
+        'p95_ms': READINESS_MAX_P95_MS,
+    },
+    recovery_ratio=READINESS_RECOVERY_RATIO,
+    window_seconds=READINESS_LATENCY_WINDOW_SECONDS
+)
+
+
+class RollingWindow:
+    """
+    Request and SLO-miss counts over the last window_seconds, in one-second
+    buckets of a ring buffer, so recording and reading are O(1) and O(window)
+    with no per-request allocation. The clock is injectable for tests.
+    """
+
+    def __init__(self, window_seconds: int, clock=time.monotonic):
+        self.size = max(1, int(window_seconds))
+        self.clock = clock
+        self.started = clock()
+        self._second = [None] * self.size
+        self._requests = [0] * self.size
+        self._misses = [0] * self.size
+
+    def record(self, miss: bool) -> None:
+        """Count one request, and whether it missed the SLO."""
+        second = int(self.clock())
+        slot = second % self.size
+        if self._second[slot] != second:
+            self._second[slot] = second
+            self._requests[slot] = self._misses[slot] = 0
+        self._requests[slot] += 1
+        if miss:
+            self._misses[slot] += 1
+
+    def totals(self) -> tuple:
+        """(requests, misses, seconds covered) over the window."""
+        now = self.clock()
+        oldest = int(now) - self.size
+        requests = misses = 0
+        for slot, second in enumerate(self._second):
+            if second is not None and second > oldest:
+                requests += self._requests[slot]
+                misses += self._misses[slot]
+        # Before a full window has passed, average over the time actually covered
+        covered = min(float(self.size), max(1.0, now - self.started))
+        return requests, misses, covered
+
+
+class AutoscalingSignals:
+    """
+    Purpose-built scaling signals for this worker: request rate smoothed over a
+    rolling window, outstanding requests (in flight plus queued for admission)
+    and the latency SLO burn ratio. Shed requests count as demand and as misses.
+    """
+
+    def __init__(self, window_seconds: int, slo_latency: float, slo_target: float,
+                 clock=time.monotonic):
+        self.window = RollingWindow(window_seconds, clock)
+        self.slo_latency = slo_latency
+        self.error_budget = max(1e-9, 1.0 - slo_target)
+
+    def observe(self, seconds: float, shed: bool = False) -> None:
+        """Record one finished (or shed) request."""
+        self.window.record(shed or seconds > self.slo_latency)
+
+    def snapshot(self) -> Dict[str, float]:
+        requests, misses, covered = self.window.totals()
+        return {
+            'requests_per_second': round(requests / covered, 3),
+            'concurrency': ADMISSION_CONTROLLER.in_flight + ADMISSION_CONTROLLER.queue_depth,
+            'slo_burn_ratio': round(misses / requests / self.error_budget, 3) if requests else 0.0,
+            'window_seconds': self.window.size,
+        }
+
+    def publish(self) -> Dict[str, float]:
+        """Refresh the autoscaling gauges; returns the snapshot."""
+        snapshot = self.snapshot()
+        AUTOSCALING_REQUEST_RATE.set(snapshot['requests_per_second'])
+        AUTOSCALING_CONCURRENCY.set(snapshot['concurrency'])
+        AUTOSCALING_SLO_BURN_RATIO.set(snapshot['slo_burn_ratio'])
+        return snapshot
+
+
+AUTOSCALING_SIGNALS = AutoscalingSignals(AUTOSCALING_WINDOW_SECONDS, SLO_LATENCY_MS / 1000, SLO_TARGET)
+
+
+class GCPauseRecorder:
+    """
+    Times garbage collector runs through gc.callbacks.
+    A collection can start in any thread, even while that thread holds a metric
+    lock, so the callback only appends to a deque; drain() moves the pauses
+    into python_gc_pause_seconds from the event loop.
+    """
+
+    def __init__(self):
+        self._started: Dict[int, float] = {}
+        self._pauses: deque = deque(maxlen=10000)  # (generation, seconds)
+
+    def __call__(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._started[threading.get_ident()] = time.perf_counter()
+        else:
+            started = self._started.pop(threading.get_ident(), None)
+            if started is not None:
+                self._pauses.append((info["generation"], time.perf_counter() - started))
+
+    def install(self) -> None:
+        if self not in gc.callbacks:
+            gc.callbacks.append(self)
+
+    def uninstall(self) -> None:
+        if self in gc.callbacks:
+            gc.callbacks.remove(self)
+
+    def drain(self) -> int:
+        """Record pauses collected since the last drain; returns how many."""
+        drained = 0
+        while self._pauses:
+            generation, seconds = self._pauses.popleft()
+            GC_PAUSE.labels(generation=str(generation)).observe(seconds)
+            drained += 1
+        return drained
+
+
+GC_PAUSE_RECORDER = GCPauseRecorder()
+
+
+async def _monitor_loop_lag(interval: float) -> None:
+    """Measure how late the event loop wakes up from a sleep of `interval`, and flush GC pauses."""
+    loop = asyncio.get_running_loop()
+    last_warning = last_publish = float('-inf')
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        SATURATION_MONITOR.observe_loop_lag(lag)
+        if LOOP_LAG_WARN_MS > 0 and lag * 1000 >= LOOP_LAG_WARN_MS and loop.time() - last_warning >= 10:
+            last_warning = loop.time()
+            logger.warning(f"Event loop blocked for {lag * 1000:.1f} ms (threshold {LOOP_LAG_WARN_MS:g} ms)")
+        GC_PAUSE_RECORDER.drain()
+        # Every worker keeps its share of the autoscaling gauges fresh for multiprocess scrapes
+        if loop.time() - last_publish >= 1:
+            last_publish = loop.time()
+            AUTOSCALING_SIGNALS.publish()
+
+
+_loop_lag_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    """Sample event-loop lag and GC pauses (also feeds saturation-aware readiness)"""
+    global _loop_lag_task
+    if GC_MONITORING:
+        GC_PAUSE_RECORDER.install()
+    if LOOP_LAG_INTERVAL_SECONDS > 0:
+        _loop_lag_task = asyncio.ensure_future(_monitor_loop_lag(LOOP_LAG_INTERVAL_SECONDS))
+
+
+@app.on_event("shutdown")
+def stop_loop_lag_monitor():
+    """Stop sampling event-loop lag and GC pauses"""
+    global _loop_lag_task
+    GC_PAUSE_RECORDER.uninstall()
+    GC_PAUSE_RECORDER.drain()
+    if _loop_lag_task is not None:
+        _loop_lag_task.cancel()
+        _loop_lag_task = None
+
+
+@app.on_event("startup")
+async def start_model_loading():
+    """Load the model off the event loop so /health answers while /ready reports loading"""
+    def log_failure(future):
+        if future.exception() is not None:
+            logger.error(f"Model loading failed: {future.exception()}")
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, MODEL_REGISTRY.ensure_loaded).add_done_callback(log_failure)
+    MODEL_REGISTRY.start_watching()
+
+
+@app.on_event("shutdown")
+def stop_model_watcher():
+    """Stop polling for new model versions"""
+    MODEL_REGISTRY.stop_watching()
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    """Release inference pool workers on shutdown"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
 @app.get("/", response_model=dict)
 async def root():
     """Root endpoint"""
@@ -145,7 +1541,9 @@ async def root():
             "ready": "/ready",
             "predict": "/predict",
             "batch": "/predict/batch",
-            "metrics": "/metrics"
+            "stream": "/predict/stream",
+            "metrics": "/metrics",
+            "autoscaling": "/metrics/autoscaling"
         }
     }
 
@@ -159,6 +1557,18 @@ async def health_check():
 @app.get("/ready", response_model=HealthResponse)
 async def readiness_check():
     """Readiness check endpoint for Kubernetes readiness probe"""
+    if MODEL_REGISTRY.active is None:
+        if MODEL_REGISTRY.load_error is not None:
+            content = _health_response("failed").model_dump()
+            content["error"] = MODEL_REGISTRY.load_error
+            return JSONResponse(status_code=503, content=content)
+        return JSONResponse(status_code=503, content=_health_response("loading").model_dump())
+    if ADAPTIVE_READINESS:
+        saturated, signals, over = SATURATION_MONITOR.check()
+        if saturated:
+            content = _health_response("saturated").model_dump()
+            content.update(saturation=signals, limits_exceeded=over)
+            return JSONResponse(status_code=503, content=content)
     return _health_response("ready")
 
 
@@ -167,27 +1577,52 @@ async def predict(request: PredictionRequest):
     """
     Predict sentiment for a single text
     """
+    timer = _STAGE_TIMER.get()
+    if timer is not None:
+        timer.lap('parse')
     ACTIVE_REQUESTS.inc()
     start_time = time.time()
 
     try:
-        # Simulate processing time
-        with INFERENCE_DURATION.time():
-            sentiment, confidence = analyze_sentiment(request.text)
-            time.sleep(0.01)  # Simulate model inference time
+        model, version = await _active_model()
+        cached = PREDICTION_CACHE.get(request.text, version)
+        if timer is not None:
+            timer.lap('cache')
+        if cached is not None:
+            sentiment, confidence = cached
+        else:
+            with INFERENCE_DURATION.labels(model_version=version).time():
+                if MICRO_BATCHING:
+                    sentiment, confidence = await MICRO_BATCHER.submit(request.text, model)
+                    if timer is not None:
+                        timer.lap('microbatch')
+                else:
+                    sentiment, confidence = await run_inference(request.text, model)
+            PREDICTION_CACHE.put(request.text, (sentiment, confidence), version)
+        MODEL_PREDICTIONS.labels(model_version=version).inc()
 
         processing_time = (time.time() - start_time) * 1000
 
         REQUEST_COUNT.labels(endpoint='predict', status='success').inc()
-        REQUEST_DURATION.labels(endpoint='predict').observe(time.time() - start_time)
-
-        return PredictionResponse(
-            text=request.text,
-            sentiment=sentiment,
-            confidence=confidence,
-            processing_time_ms=round(processing_time, 2),
-            timestamp=datetime.utcnow().isoformat()
-        )
+        duration = time.time() - start_time
+        REQUEST_DURATION.labels(endpoint='predict').observe(duration)
+        SATURATION_MONITOR.observe_latency(duration)
+
+        payload = {
+            "text": request.text,
+            "sentiment": sentiment,
+            "confidence": confidence,
+            "processing_time_ms": round(processing_time, 2),
+            "timestamp": datetime.utcnow().isoformat(),
+            "model_version": version
+        }
+        if FAST_JSON_RESPONSES:
+            return _json_response(payload)
+        return PredictionResponse(**payload)
+
+    except HTTPException:
+        REQUEST_COUNT.labels(endpoint='predict', status='error').inc()
+        raise
 
     except Exception as e:
         REQUEST_COUNT.labels(endpoint='predict', status='error').inc()
@@ -203,33 +1638,58 @@ async def predict_batch(request: BatchPredictionRequest):
     """
     Predict sentiment for multiple texts in a batch
     """
+    timer = _STAGE_TIMER.get()
+    if timer is not None:
+        timer.lap('parse')
     ACTIVE_REQUESTS.inc()
     start_time = time.time()
-    predictions = []
 
     try:
-        for text in request.texts:
-            pred_start = time.time()
-            sentiment, confidence = analyze_sentiment(text)
-            pred_time = (time.time() - pred_start) * 1000
-
-            predictions.append(PredictionResponse(
-                text=text,
-                sentiment=sentiment,
-                confidence=confidence,
-                processing_time_ms=round(pred_time, 2),
-                timestamp=datetime.utcnow().isoformat()
-            ))
+        texts = request.texts
+        model, version = await _active_model()
+        results = [PREDICTION_CACHE.get(text, version) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if timer is not None:
+            timer.lap('cache')
+        if missing:
+            with INFERENCE_DURATION.labels(model_version=version).time():
+                scored = await _score(model.predict_batch, [texts[i] for i in missing])
+            for i, result in zip(missing, scored):
+                results[i] = result
+                PREDICTION_CACHE.put(texts[i], result, version)
+        MODEL_PREDICTIONS.labels(model_version=version).inc(len(texts))
+
+        # One timestamp and amortized per-text time for the whole batch
+        per_text_time = round((time.time() - start_time) * 1000 / len(texts), 2)
+        timestamp = datetime.utcnow().isoformat()
+        predictions = [
+            {
+                "text": text,
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "processing_time_ms": per_text_time,
+                "timestamp": timestamp,
+                "model_version": version
+            }
+            for text, (sentiment, confidence) in zip(texts, results)
+        ]
 
         total_time = (time.time() - start_time) * 1000
 
         REQUEST_COUNT.labels(endpoint='batch', status='success').inc()
-        REQUEST_DURATION.labels(endpoint='batch').observe(time.time() - start_time)
+        duration = time.time() - start_time
+        REQUEST_DURATION.labels(endpoint='batch').observe(duration)
+        SATURATION_MONITOR.observe_latency(duration)
 
-        return BatchPredictionResponse(
-            predictions=predictions,
-            total_processing_time_ms=round(total_time, 2)
-        )
+        # Predictions are built from already-typed values, so skip re-validation
+        return _json_response({
+            "predictions": predictions,
+            "total_processing_time_ms": round(total_time, 2)
+        })
+
+    except HTTPException:
+        REQUEST_COUNT.labels(endpoint='batch', status='error').inc()
+        raise
 
     except Exception as e:
         REQUEST_COUNT.labels(endpoint='batch', status='error').inc()
@@ -240,10 +1700,201 @@ async def predict_batch(request: BatchPredictionRequest):
         ACTIVE_REQUESTS.dec()
 
 
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    Predict sentiment for an NDJSON stream of {"text": ...} objects
+    Predictions are streamed back as NDJSON in input order; invalid lines
+    produce {"line": n, "error": ...} entries instead of failing the stream.
+    """
+    # Resolved before streaming starts so an unavailable model is still a 503,
+    # and the whole stream is served by the version active when it started
+    model, version = await _active_model()
+    return NDJSONStreamingResponse(_stream_predictions(request, model, version))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the running process.
+    A background thread snapshots every other thread's stack each interval
+    and counts identical stacks, giving flamegraph-compatible collapsed
+    output (root;...;leaf count). Overhead is bounded by the interval, not by
+    how much code runs, and nothing is hooked into the profiled threads.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Dict[str, int] = {}
+        self._labels: Dict[object, str] = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self, exclude: int) -> None:
+        """Record the current stack of every thread except exclude."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            stack = ";".join(reversed(frames))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> None:
+        """Sample until seconds have elapsed (blocking; call from a worker thread)."""
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while True:
+            self.sample(me)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(self.interval, remaining))
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first, as consumed by flamegraph.pl and speedscope."""
+        ordered = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+
+_profile_lock = asyncio.Lock()
+
+
+@app.get("/debug/profile")
+async def debug_profile(
+    request: Request,
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1.0, le=1000.0)
+):
+    """
+    Sample this worker process for `seconds` and return collapsed stacks.
+    Disabled unless DEBUG_PROFILING=true and DEBUG_PROFILING_TOKEN is set; the
+    token must be sent as a bearer token. One profile runs at a time per worker,
+    and profiling requests go through admission control like any other request.
+    """
+    if not (DEBUG_PROFILING and DEBUG_PROFILING_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {DEBUG_PROFILING_TOKEN}"):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+    if seconds > MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=422,
+                            detail=f"seconds must be at most {MAX_PROFILE_SECONDS:g}")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval_ms / 1000)
+        # The default executor is separate from the inference pool, so a busy pool cannot delay sampling
+        await asyncio.get_running_loop().run_in_executor(None, profiler.run, seconds)
+
+    logger.info(f"Profiled worker {os.getpid()} for {seconds:g}s ({profiler.samples} samples)")
+    return Response(content=profiler.collapsed(), media_type="text/plain",
+                    headers={"X-Profile-Samples": str(profiler.samples),
+                             "X-Profile-Pid": str(os.getpid())})
+
+
+def _metrics_registry() -> CollectorRegistry:
+    """Registry to expose: this process, or all workers in multiprocess mode."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+class MetricsCache:
+    """
+    Renders the /metrics exposition off the event loop and reuses it for ttl_seconds.
+    Entries are kept per content type (Prometheus text or OpenMetrics); concurrent
+    scrapes of a stale entry share one render, and the gzip body is compressed at
+    most once per render.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # content type -> [rendered_at, body, gzipped body or None]
+        self._entries: Dict[str, list] = {}
+        self._renders: Dict[str, asyncio.Future] = {}
+
+    async def get(self, accept: str, use_gzip: bool) -> tuple:
+        """Return (body, content_type) for the negotiated format, gzipped if requested."""
+        encoder, content_type = choose_encoder(accept)
+        entry = self._entries.get(content_type)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+            render = self._renders.get(content_type)
+            if render is None:
+                render = asyncio.ensure_future(self._render(encoder, content_type))
+                self._renders[content_type] = render
+                render.add_done_callback(lambda _: self._renders.pop(content_type, None))
+            entry = await asyncio.shield(render)
+        if not use_gzip:
+            return entry[1], content_type
+        if entry[2] is None:
+            loop = asyncio.get_running_loop()
+            entry[2] = await loop.run_in_executor(None, gzip.compress, entry[1])
+        return entry[2], content_type
+
+    async def _render(self, encoder, content_type: str) -> list:
+        fmt = 'openmetrics' if content_type.startswith('application/openmetrics-text') else 'text'
+        loop = asyncio.get_running_loop()
+        with METRICS_RENDER_DURATION.labels(format=fmt).time():
+            body = await loop.run_in_executor(None, encoder, _metrics_registry())
+        entry = [time.monotonic(), body, None]
+        self._entries[content_type] = entry
+        return entry
+
+    def clear(self) -> None:
+        """Drop rendered expositions so the next scrape renders afresh."""
+        self._entries.clear()
+
+
+METRICS_CACHE = MetricsCache(METRICS_CACHE_SECONDS)
+
+
+@app.get("/metrics/autoscaling")
+async def autoscaling_metrics():
+    """This worker's autoscaling signals as JSON (e.g. for a KEDA metrics-api scaler)"""
+    return AUTOSCALING_SIGNALS.publish()
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (an explicit entry wins over "*"; q=0 refuses)."""
+    qualities = {}
+    for entry in accept_encoding.split(','):
+        coding, _, params = entry.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
 @app.get("/metrics")
-async def metrics():
-    """Prometheus metrics endpoint"""
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request):
+    """Prometheus metrics endpoint (Prometheus text or OpenMetrics, optionally gzipped)"""
+    GC_PAUSE_RECORDER.drain()
+    AUTOSCALING_SIGNALS.publish()
+    use_gzip = _accepts_gzip(request.headers.get('accept-encoding', ''))
+    body, content_type = await METRICS_CACHE.get(request.headers.get('accept', ''), use_gzip)
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(content=body, media_type=content_type, headers=headers)
 
 
 if __name__ == "__main__":
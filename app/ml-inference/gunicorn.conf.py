@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for multi-worker serving of the ML inference service.
+Worker count comes from WEB_CONCURRENCY; with more than one worker, Prometheus
+metrics switch to multiprocess mode so /metrics aggregates all workers.
+"""
+
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.environ.get('WORKER_TIMEOUT', '30'))
+graceful_timeout = 10
+accesslog = None
+
+if workers > 1:
+    # prometheus_client chooses file-backed values once, when it is first imported.
+    # Workers fork from this process, so it must not import prometheus_client before
+    # this is set; the hooks below import it lazily for that reason.
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+
+def on_starting(server):
+    """Start each run with an empty metrics directory."""
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauge samples of workers that exited."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,13 +1,18 @@
-from flask import Flask, Response, jsonify, request
+from flask import Flask, Response, request
 from flask_cors import CORS
 import subprocess
+import tempfile
 import json
+import hashlib
 import time
 import threading
 import os
 import re
 import logging
-from typing import Dict, List, Tuple, Optional, Any, Generator
+from dataclasses import dataclass, replace
+from functools import partial
+from urllib.parse import urlencode
+from typing import Dict, List, Tuple, Optional, Union, Any, Callable, Generator, Iterable, Iterator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,21 +40,132 @@ def get_base_domain() -> str:
 
     return ''  # Default to empty (will use localhost URLs)
 
-deployment_state: Dict[str, Any] = {
-    "start_time": time.time(),
-    "argocd_apps": [],
-    "pods": [],
-    "events": [],
-    "progress": 0,
-    "phase": "Initializing"
-}
-
-def run_command(cmd: str) -> str:
-    """Execute a command safely without shell=True."""
+# Namespaces whose pods the dashboard tracks, each queried separately
+WATCHED_NAMESPACES = tuple(
+    ns.strip() for ns in os.environ.get('DASHBOARD_NAMESPACES', 'ml-inference,monitoring,argocd').split(',')
+    if ns.strip()
+)
+# Optional server-side pod filters, e.g. POD_FIELD_SELECTOR=status.phase!=Succeeded
+POD_LABEL_SELECTOR = os.environ.get('POD_LABEL_SELECTOR', '')
+POD_FIELD_SELECTOR = os.environ.get('POD_FIELD_SELECTOR', '')
+# Only the fields the dashboard shows: a "List" header line, then one tab-separated line per pod.
+# kubectl applies it client-side to a List it builds itself, so the list's resourceVersion is
+# always empty there; what the API server sends is bounded by namespace and selectors
+POD_PROJECTION = ('{.kind}{"\\n"}{range .items[*]}{.metadata.namespace}{"\\t"}'
+                  '{.metadata.name}{"\\t"}{.status.phase}{"\\t"}{.status.containerStatuses[*].ready}'
+                  '{"\\n"}{end}')
+# Kubernetes API path listed once and then watched for changes
+APPLICATIONS_API_PATH = "/apis/argoproj.io/v1alpha1/namespaces/argocd/applications"
+# Server-side watch timeout; the informer re-watches from its last resourceVersion
+WATCH_TIMEOUT_SECONDS = int(os.environ.get('WATCH_TIMEOUT_SECONDS', '300'))
+WATCH_RETRY_SECONDS = float(os.environ.get('WATCH_RETRY_SECONDS', '3'))
+# Consecutive failures double the retry delay up to this cap
+WATCH_MAX_BACKOFF_SECONDS = float(os.environ.get('WATCH_MAX_BACKOFF_SECONDS', '60'))
+# How much of a failed watch's kubectl error output is kept for the raised error
+WATCH_STDERR_TAIL_BYTES = 4096
+# Per-source timeouts for the initial list of each informer
+ARGOCD_TIMEOUT_SECONDS = float(os.environ.get('ARGOCD_TIMEOUT_SECONDS', '5'))
+PODS_TIMEOUT_SECONDS = float(os.environ.get('PODS_TIMEOUT_SECONDS', '5'))
+
+@dataclass(frozen=True)
+class DeploymentSnapshot:
+    """One published, read-only view of the deployment; never mutated after publishing."""
+    version: int
+    start_time: float
+    argocd_apps: Tuple[Dict[str, str], ...] = ()
+    pods: Tuple[Dict[str, str], ...] = ()
+    events: Tuple[Dict[str, Any], ...] = ()
+    progress: int = 0
+    phase: str = "Initializing"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-ready fields, as served by /api/status."""
+        return {"version": self.version, "start_time": self.start_time,
+                "argocd_apps": self.argocd_apps, "pods": self.pods, "events": self.events,
+                "progress": self.progress, "phase": self.phase}
+
+class SnapshotStore:
+    """
+    Holds the current DeploymentSnapshot. Writers build a new snapshot and publish
+    it by swapping a single reference, so readers always see one consistent
+    version without locking or copying.
+    """
+
+    def __init__(self, snapshot: DeploymentSnapshot):
+        self._snapshot = snapshot
+        self._changed = threading.Condition()
+
+    def current(self) -> DeploymentSnapshot:
+        return self._snapshot
+
+    def publish(self, **changes: Any) -> DeploymentSnapshot:
+        """Publish a copy of the current snapshot with changes applied and the next version."""
+        for field in ("argocd_apps", "pods", "events"):
+            if field in changes:
+                changes[field] = tuple(changes[field])
+        with self._changed:
+            snapshot = replace(self._snapshot, version=self._snapshot.version + 1, **changes)
+            self._snapshot = snapshot
+            self._changed.notify_all()
+        return snapshot
+
+    def wait_for_change(self, version: int, timeout: float) -> DeploymentSnapshot:
+        """Return the first snapshot newer than version, or the current one after timeout."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._snapshot.version != version, timeout)
+            return self._snapshot
+
+deployment_state = SnapshotStore(DeploymentSnapshot(version=0, start_time=time.time()))
+
+def body_etag(body: bytes) -> str:
+    """Content hash used as a strong ETag."""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def json_response(body: bytes, etag: str, weak: bool = False) -> Response:
+    """Serve pre-serialized JSON, answering a matching If-None-Match with 304."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+class ResponseCache:
+    """
+    Serialized JSON bodies and ETags for the current snapshot version. render()
+    maps a snapshot to every payload at once; they are serialized on the first
+    request after a publish and then served from memory until the next one.
+    """
+
+    def __init__(self, store: SnapshotStore,
+                 render: Callable[[DeploymentSnapshot], Dict[str, Any]]):
+        self.store = store
+        self.render = render
+        self._rendered: Tuple[int, Dict[str, Tuple[bytes, str]]] = (-1, {})
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Tuple[bytes, str]:
+        """(body, etag) of one payload for the current version."""
+        version, bodies = self._rendered
+        if version != self.store.current().version:
+            with self._lock:
+                snapshot = self.store.current()
+                version, bodies = self._rendered
+                if version != snapshot.version:
+                    bodies = {}
+                    for key, payload in self.render(snapshot).items():
+                        body = app.json.dumps(payload).encode()
+                        bodies[key] = (body, body_etag(body))
+                    self._rendered = (snapshot.version, bodies)
+        return bodies[name]
+
+def run_command(cmd: Union[str, List[str]], timeout: float = 5) -> str:
+    """
+    Execute a command safely without shell=True. A string is split on
+    whitespace; pass an argv list when an argument may contain spaces.
+    """
     try:
         # Split command string into list for safe execution
-        cmd_list = cmd.split()
-        result = subprocess.run(cmd_list, capture_output=True, text=True, timeout=5, check=False)
+        cmd_list = cmd.split() if isinstance(cmd, str) else cmd
+        result = subprocess.run(cmd_list, capture_output=True, text=True, timeout=timeout, check=False)
         return result.stdout.strip()
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
         logger.warning(f"Command failed: {cmd} - {e}")
@@ -58,47 +174,68 @@ def run_command(cmd: str) -> str:
         logger.error(f"Unexpected error running command {cmd}: {e}")
         return ""
 
-def get_argocd_status() -> List[Dict[str, str]]:
-    """Get ArgoCD application status."""
-    try:
-        output = run_command("argocd app list -o json")
-        if output and output != '[]':
-            apps = json.loads(output)
-            return [{"name": app.get("metadata", {}).get("name", "unknown"),
-                     "sync": app.get("status", {}).get("sync", {}).get("status", "Unknown"),
-                     "health": app.get("status", {}).get("health", {}).get("status", "Unknown")}
-                    for app in apps]
-    except json.JSONDecodeError as e:
-        logger.warning(f"Failed to parse ArgoCD JSON output: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error getting ArgoCD status: {e}")
-    return []
-
-def get_pods_status() -> List[Dict[str, str]]:
-    """Get Kubernetes pod status."""
-    try:
-        output = run_command("kubectl get pods -A -o json")
-        if output:
-            data = json.loads(output)
-            pods = []
-            for item in data.get("items", []):
-                ns = item["metadata"]["namespace"]
-                if ns in ["ml-inference", "monitoring", "argocd"]:
-                    ready = "0/0"
-                    if "containerStatuses" in item["status"]:
-                        total = len(item["status"]["containerStatuses"])
-                        ready_count = sum(1 for c in item["status"]["containerStatuses"] if c.get("ready"))
-                        ready = f"{ready_count}/{total}"
-                    pods.append({"namespace": ns, "name": item["metadata"]["name"],
-                                "status": item["status"]["phase"], "ready": ready})
-            return pods
-    except json.JSONDecodeError as e:
-        logger.warning(f"Failed to parse kubectl JSON output: {e}")
-    except (KeyError, TypeError) as e:
-        logger.warning(f"Unexpected pod data structure: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error getting pod status: {e}")
-    return []
+def summarize_app(app: Dict[str, Any]) -> Dict[str, str]:
+    """Reduce an ArgoCD Application object to name, sync and health."""
+    return {"name": app.get("metadata", {}).get("name", "unknown"),
+            "sync": app.get("status", {}).get("sync", {}).get("status", "Unknown"),
+            "health": app.get("status", {}).get("health", {}).get("status", "Unknown")}
+
+def summarize_pod(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Reduce a Pod object to namespace, name, phase and ready count (None outside WATCHED_NAMESPACES)."""
+    ns = item["metadata"]["namespace"]
+    if ns not in WATCHED_NAMESPACES:
+        return None
+    ready = "0/0"
+    if "containerStatuses" in item["status"]:
+        total = len(item["status"]["containerStatuses"])
+        ready_count = sum(1 for c in item["status"]["containerStatuses"] if c.get("ready"))
+        ready = f"{ready_count}/{total}"
+    return {"namespace": ns, "name": item["metadata"]["name"],
+            "status": item["status"].get("phase", "Unknown"), "ready": ready}
+
+def _pod_selectors() -> Dict[str, str]:
+    """Label and field selectors applied to every pod query."""
+    selectors = {}
+    if POD_LABEL_SELECTOR:
+        selectors["labelSelector"] = POD_LABEL_SELECTOR
+    if POD_FIELD_SELECTOR:
+        selectors["fieldSelector"] = POD_FIELD_SELECTOR
+    return selectors
+
+def list_pods(namespace: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    List one namespace's pods, filtered by the pod selectors in the API server.
+    kubectl reduces the result to POD_PROJECTION, so the dashboard parses only
+    the fields summarize_pod reads. Returns (trimmed pod objects, resourceVersion).
+    The resourceVersion comes from a one-item server list made first, so a watch
+    from it replays, rather than misses, changes made while the pods are listed.
+    """
+    selectors = _pod_selectors()
+    _, resource_version = kubectl_list(
+        f"/api/v1/namespaces/{namespace}/pods?{urlencode({**selectors, 'limit': '1'})}",
+        timeout=PODS_TIMEOUT_SECONDS)
+    cmd = ["kubectl", "get", "pods", "-n", namespace]
+    if "labelSelector" in selectors:
+        cmd += ["-l", selectors["labelSelector"]]
+    if "fieldSelector" in selectors:
+        cmd += ["--field-selector", selectors["fieldSelector"]]
+    output = run_command(cmd + ["-o", f"jsonpath={POD_PROJECTION}"], timeout=PODS_TIMEOUT_SECONDS)
+    if not output:
+        raise RuntimeError(f"kubectl returned no output for pods in {namespace}")
+
+    _, *lines = output.split("\n")
+    pods = []
+    for line in lines:
+        fields = line.split("\t")
+        if len(fields) < 3:
+            continue
+        ready = fields[3].split() if len(fields) > 3 else []
+        pods.append({
+            "metadata": {"namespace": fields[0], "name": fields[1]},
+            "status": {"phase": fields[2] or "Unknown",
+                       "containerStatuses": [{"ready": flag == "true"} for flag in ready]},
+        })
+    return pods, resource_version or None
 
 def is_pod_ready(pod: Dict[str, str]) -> bool:
     """Check if a pod has all containers ready."""
@@ -119,9 +256,12 @@ def get_deployment_stats(apps: List[Dict[str, str]], pods: List[Dict[str, str]])
         "ready_pods": sum(1 for pod in pods if is_pod_ready(pod))
     }
 
-def calculate_progress() -> int:
-    apps = deployment_state["argocd_apps"]
-    pods = deployment_state["pods"]
+def calculate_progress(apps: Optional[Iterable[Dict[str, str]]] = None,
+                       pods: Optional[Iterable[Dict[str, str]]] = None) -> int:
+    """Weighted deployment progress, for the current snapshot unless apps/pods are given."""
+    snapshot = deployment_state.current()
+    apps = snapshot.argocd_apps if apps is None else apps
+    pods = snapshot.pods if pods is None else pods
     if not apps:
         return 10
 
@@ -134,34 +274,242 @@ def calculate_progress() -> int:
 
     return min(int(score), 100)
 
-def update_state() -> None:
-    """Background thread to continuously update deployment state."""
-    while True:
+def calculate_phase(progress: int, pods: List[Dict[str, str]]) -> str:
+    """Describe the deployment phase for a progress value."""
+    running_count = sum(1 for pod in pods if pod["status"] == "Running")
+    pending_count = sum(1 for pod in pods if pod["status"] == "Pending")
+
+    if progress < 20:
+        return "Initializing ArgoCD"
+    elif progress < 70:
+        return "Syncing Applications"
+    elif pending_count > 0:
+        return f"Starting Pods ({running_count}/{len(pods)} running)"
+    elif progress < 100:
+        return "Waiting for Ready"
+    return "Deployment Complete"
+
+def iter_json_stream(chunks: Iterable[str]) -> Iterator[Any]:
+    """Decode a stream of concatenated JSON documents (one per line or pretty-printed)."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            try:
+                document, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break  # Incomplete document, wait for more input
+            yield document
+            buffer = buffer[end:]
+
+def kubectl_list(path: str, timeout: float = 5) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """List objects at a Kubernetes API path, returning (items, resourceVersion)."""
+    output = run_command(f"kubectl get --raw {path}", timeout=timeout)
+    if not output:
+        raise RuntimeError(f"kubectl returned no output for {path}")
+    data = json.loads(output)
+    return data.get("items", []), data.get("metadata", {}).get("resourceVersion")
+
+def kubectl_watch(path: str, resource_version: Optional[str],
+                  params: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream watch events for a Kubernetes API path, starting after resource_version."""
+    query = {**(params or {}), "watch": "1", "allowWatchBookmarks": "true",
+             "timeoutSeconds": str(WATCH_TIMEOUT_SECONDS)}
+    if resource_version:
+        query["resourceVersion"] = resource_version
+    # stderr goes to a file, not a pipe: nothing reads it while stdout streams, and a
+    # full pipe would block kubectl mid-watch
+    with tempfile.TemporaryFile() as stderr, \
+            subprocess.Popen(["kubectl", "get", "--raw", f"{path}?{urlencode(query)}"],
+                             stdout=subprocess.PIPE, stderr=stderr, text=True) as process:
         try:
-            deployment_state["argocd_apps"] = get_argocd_status()
-            deployment_state["pods"] = get_pods_status()
-            deployment_state["progress"] = calculate_progress()
-            p = deployment_state["progress"]
-
-            pods = deployment_state["pods"]
-            running_count = sum(1 for pod in pods if pod["status"] == "Running")
-            pending_count = sum(1 for pod in pods if pod["status"] == "Pending")
-
-            if p < 20:
-                deployment_state["phase"] = "Initializing ArgoCD"
-            elif p < 70:
-                deployment_state["phase"] = "Syncing Applications"
-            elif pending_count > 0:
-                deployment_state["phase"] = f"Starting Pods ({running_count}/{len(pods)} running)"
-            elif p < 100:
-                deployment_state["phase"] = "Waiting for Ready"
-            else:
-                deployment_state["phase"] = "Deployment Complete"
-        except Exception as e:
-            logger.error(f"Error updating state: {e}")
-        time.sleep(3)
-
-threading.Thread(target=update_state, daemon=True).start()
+            yield from iter_json_stream(process.stdout)
+            # A failed watch (HTTP 410, RBAC, connection) must not look like a clean timeout
+            if process.wait() != 0:
+                size = stderr.seek(0, os.SEEK_END)
+                stderr.seek(max(0, size - WATCH_STDERR_TAIL_BYTES))
+                error = stderr.read().decode(errors="replace").strip()
+                raise RuntimeError(f"kubectl watch of {path} exited with {process.returncode}: {error}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+
+class Informer:
+    """
+    In-memory copy of one Kubernetes resource type, kept current by a watch.
+    Lists once, then applies ADDED/MODIFIED/DELETED watch events as deltas to the
+    store, resuming each new watch from the last seen resourceVersion and listing
+    again only when the watch reports its version expired (410 Gone) or fails.
+    list_fn() returns (raw objects, resourceVersion); watch_fn(resource_version)
+    yields watch events; project() maps a raw object to its stored summary (None
+    to ignore it); on_change() runs after the store changes.
+    Each informer runs on its own thread, so a slow source never delays the
+    others; consecutive failures back off exponentially and last_success
+    records when the source last delivered a list or event.
+    """
+
+    def __init__(self, name: str,
+                 list_fn: Callable[[], Tuple[List[Dict[str, Any]], Optional[str]]],
+                 watch_fn: Callable[[Optional[str]], Iterable[Dict[str, Any]]],
+                 project: Callable[[Dict[str, Any]], Optional[Dict[str, str]]],
+                 on_change: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.list_fn = list_fn
+        self.watch_fn = watch_fn
+        self.project = project
+        self.on_change = on_change
+        self.resource_version: Optional[str] = None
+        self.last_success: Optional[float] = None
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._store: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(obj: Dict[str, Any]) -> Tuple[str, str]:
+        metadata = obj.get("metadata", {})
+        return metadata.get("namespace", ""), metadata.get("name", "")
+
+    def status(self) -> Dict[str, Any]:
+        """Freshness of this source: last success time, consecutive failures and last error."""
+        return {"last_success": self.last_success, "failures": self.failures,
+                "last_error": self.last_error}
+
+    def _succeeded(self) -> None:
+        self.last_success = time.time()
+        self.failures = 0
+        self.last_error = None
+
+    def items(self) -> List[Dict[str, str]]:
+        """Stored summaries, ordered by namespace and name."""
+        with self._lock:
+            return [self._store[key] for key in sorted(self._store)]
+
+    def resync(self) -> None:
+        """Replace the store with a full list."""
+        objects, resource_version = self.list_fn()
+        store = {}
+        for obj in objects:
+            summary = self.project(obj)
+            if summary is not None:
+                store[self._key(obj)] = summary
+        with self._lock:
+            self._store = store
+            self.resource_version = resource_version
+        self._succeeded()
+        self._notify()
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """Apply one watch event; returns False when a re-list is needed."""
+        event_type = event.get("type")
+        obj = event.get("object") or {}
+        if event_type == "ERROR":
+            logger.info(f"{self.name} watch expired: {obj.get('message', obj)}")
+            return False
+
+        changed = False
+        with self._lock:
+            if event_type in ("ADDED", "MODIFIED", "DELETED"):
+                key = self._key(obj)
+                summary = self.project(obj) if event_type != "DELETED" else None
+                if summary is None:
+                    changed = self._store.pop(key, None) is not None
+                elif self._store.get(key) != summary:
+                    self._store[key] = summary
+                    changed = True
+            self.resource_version = obj.get("metadata", {}).get("resourceVersion") or self.resource_version
+        self._succeeded()
+        if changed:
+            self._notify()
+        return True
+
+    def _notify(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+    def retry_delay(self) -> float:
+        """Seconds to wait before the next attempt, doubling per consecutive failure."""
+        if self.failures == 0:
+            return WATCH_RETRY_SECONDS
+        return min(WATCH_MAX_BACKOFF_SECONDS, WATCH_RETRY_SECONDS * 2 ** (self.failures - 1))
+
+    def run(self, stop: threading.Event) -> None:
+        """List and watch until stop is set, backing off after failures."""
+        needs_list = True
+        while not stop.is_set():
+            events = 0
+            try:
+                if needs_list:
+                    self.resync()
+                    needs_list = False
+                for event in self.watch_fn(self.resource_version):
+                    events += 1
+                    if stop.is_set():
+                        return
+                    if not self.apply(event):
+                        needs_list = True
+                        break
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning(f"{self.name} informer failed ({self.failures} in a row): {e}")
+                needs_list = True
+            if needs_list or events == 0:
+                stop.wait(self.retry_delay())
+
+_state_lock = threading.Lock()
+
+def refresh_state() -> None:
+    """Publish a new deployment snapshot built from the informer stores."""
+    # Serializes read-and-publish so a slower thread cannot publish older stores
+    with _state_lock:
+        apps = APP_INFORMER.items()
+        pods = [pod for informer in POD_INFORMERS for pod in informer.items()]
+        progress = calculate_progress(apps, pods)
+        deployment_state.publish(argocd_apps=apps, pods=pods, progress=progress,
+                                 phase=calculate_phase(progress, pods))
+
+APP_INFORMER = Informer(
+    "applications",
+    list_fn=lambda: kubectl_list(APPLICATIONS_API_PATH, timeout=ARGOCD_TIMEOUT_SECONDS),
+    watch_fn=lambda resource_version: kubectl_watch(APPLICATIONS_API_PATH, resource_version),
+    project=summarize_app,
+    on_change=refresh_state
+)
+def watch_pods(namespace: str, resource_version: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Watch one namespace's pods, filtered server-side by the pod selectors."""
+    return kubectl_watch(f"/api/v1/namespaces/{namespace}/pods", resource_version, _pod_selectors())
+
+# One informer per namespace: lists and watches run concurrently and only
+# transfer pods from the watched namespaces
+POD_INFORMERS = [
+    Informer(
+        f"pods/{namespace}",
+        list_fn=partial(list_pods, namespace),
+        watch_fn=partial(watch_pods, namespace),
+        project=summarize_pod,
+        on_change=refresh_state
+    )
+    for namespace in WATCHED_NAMESPACES
+]
+
+def source_status() -> Dict[str, Dict[str, Any]]:
+    """Per-source freshness for /api/status, keyed by informer name."""
+    return {informer.name: informer.status() for informer in (APP_INFORMER, *POD_INFORMERS)}
+
+def start_informers(stop: Optional[threading.Event] = None) -> threading.Event:
+    """Run each informer on a daemon thread; set the returned event to stop them."""
+    stop = stop or threading.Event()
+    for informer in (APP_INFORMER, *POD_INFORMERS):
+        threading.Thread(target=informer.run, args=(stop,), name=f"informer-{informer.name}",
+                         daemon=True).start()
+    return stop
+
+start_informers()
 
 @app.route('/')
 def index() -> str:
@@ -838,27 +1186,35 @@ graph TB
 
 @app.route('/api/status')
 def status() -> Response:
-    """Get current status as JSON"""
-    elapsed = int(time.time() - deployment_state["start_time"])
-    return jsonify({
-        **deployment_state,
-        "elapsed": elapsed,
-        "base_domain": get_base_domain()
-    })
+    """
+    Get current status as JSON. The weak ETag covers the snapshot, base_domain
+    and each source's status, so an informer failing or recovering is a new
+    response; clients revalidate to 304 while only elapsed moves, which is as of
+    the last full response.
+    """
+    snapshot_body, snapshot_etag = RESPONSE_CACHE.get("status")
+    live = {"base_domain": get_base_domain(), "sources": source_status()}
+    etag = body_etag(snapshot_etag.encode() + app.json.dumps(live).encode())
+    if request.if_none_match.contains_weak(etag):
+        return json_response(snapshot_body, etag, weak=True)
+    live["elapsed"] = int(time.time() - deployment_state.current().start_time)
+    # Splice the per-request fields into the cached object: '{a}' + '{b}' -> '{a,b}'
+    body = snapshot_body[:-1] + b"," + app.json.dumps(live).encode()[1:]
+    return json_response(body, etag, weak=True)
 
 @app.route('/api/stream')
 def stream() -> Response:
     def generate() -> Generator[str, None, None]:
+        snapshot = deployment_state.current()
         while True:
-            elapsed = int(time.time() - deployment_state["start_time"])
-            data = {**deployment_state, "elapsed": elapsed, "events": [], "start_time": None}
+            elapsed = int(time.time() - snapshot.start_time)
+            data = {**snapshot.as_dict(), "elapsed": elapsed, "events": [], "start_time": None}
             yield f"data: {json.dumps(data)}\n\n"
-            time.sleep(3)
+            # Push new versions as soon as they are published, otherwise every 3s
+            snapshot = deployment_state.wait_for_change(snapshot.version, timeout=3)
     return Response(generate(), mimetype='text/event-stream')
 
-@app.route('/api/debug')
-def debug() -> Response:
-    """Debug endpoint to see detailed pod statuses"""
+def _debug_payload(snapshot: DeploymentSnapshot, stats: Dict[str, int]) -> Dict[str, Any]:
     pods_detail = [{
         "name": pod["name"],
         "namespace": pod["namespace"],
@@ -866,22 +1222,29 @@ def debug() -> Response:
         "ready": pod["ready"],
         "is_running": pod["status"] == "Running",
         "is_ready": is_pod_ready(pod)
-    } for pod in deployment_state["pods"]]
+    } for pod in snapshot.pods]
 
-    return jsonify({
-        "argocd_apps": deployment_state["argocd_apps"],
+    return {
+        "version": snapshot.version,
+        "argocd_apps": snapshot.argocd_apps,
         "pods": pods_detail,
-        "progress": deployment_state["progress"],
-        "phase": deployment_state["phase"],
-        "summary": get_deployment_stats(deployment_state["argocd_apps"], deployment_state["pods"])
-    })
+        "progress": snapshot.progress,
+        "phase": snapshot.phase,
+        "summary": stats
+    }
 
-@app.route('/api/badge/argocd')
-def badge_argocd() -> Response:
-    """Badge endpoint for ArgoCD status"""
-    apps = deployment_state["argocd_apps"]
-    synced = sum(1 for app in apps if app["sync"] == "Synced")
-    total = len(apps)
+def _badge(label: str, message: str, color: str) -> Dict[str, Any]:
+    """shields.io endpoint badge schema."""
+    return {
+        "schemaVersion": 1,
+        "label": label,
+        "message": message,
+        "color": color
+    }
+
+def _argocd_badge(stats: Dict[str, int]) -> Dict[str, Any]:
+    synced = stats["synced_apps"]
+    total = stats["total_apps"]
 
     if total == 0:
         color = "inactive"
@@ -895,21 +1258,12 @@ def badge_argocd() -> Response:
     else:
         color = "critical"
         message = f"{synced}/{total} Synced"
+    return _badge("ArgoCD", message, color)
 
-    return jsonify({
-        "schemaVersion": 1,
-        "label": "ArgoCD",
-        "message": message,
-        "color": color
-    })
-
-@app.route('/api/badge/pods')
-def badge_pods() -> Response:
-    """Badge endpoint for Pods status"""
-    pods = deployment_state["pods"]
-    running = sum(1 for pod in pods if pod["status"] == "Running")
-    ready = sum(1 for pod in pods if is_pod_ready(pod))
-    total = len(pods)
+def _pods_badge(stats: Dict[str, int]) -> Dict[str, Any]:
+    running = stats["running_pods"]
+    ready = stats["ready_pods"]
+    total = stats["total_pods"]
 
     if total == 0:
         color = "inactive"
@@ -923,20 +1277,11 @@ def badge_pods() -> Response:
     else:
         color = "critical"
         message = f"{ready}/{total} Ready"
+    return _badge("Pods", message, color)
 
-    return jsonify({
-        "schemaVersion": 1,
-        "label": "Pods",
-        "message": message,
-        "color": color
-    })
-
-@app.route('/api/badge/health')
-def badge_health() -> Response:
-    """Badge endpoint for overall health"""
-    apps = deployment_state["argocd_apps"]
-    healthy = sum(1 for app in apps if app["health"] == "Healthy")
-    total = len(apps)
+def _health_badge(stats: Dict[str, int]) -> Dict[str, Any]:
+    healthy = stats["healthy_apps"]
+    total = stats["total_apps"]
 
     if total == 0:
         color = "inactive"
@@ -950,19 +1295,9 @@ def badge_health() -> Response:
     else:
         color = "critical"
         message = "Unhealthy"
+    return _badge("Health", message, color)
 
-    return jsonify({
-        "schemaVersion": 1,
-        "label": "Health",
-        "message": message,
-        "color": color
-    })
-
-@app.route('/api/badge/deployment')
-def badge_deployment() -> Response:
-    """Badge endpoint for deployment progress"""
-    progress = deployment_state["progress"]
-
+def _deployment_badge(progress: int) -> Dict[str, Any]:
     if progress >= 100:
         color = "success"
         message = "Complete"
@@ -975,13 +1310,46 @@ def badge_deployment() -> Response:
     else:
         color = "blue"
         message = f"{progress}%"
+    return _badge("Deployment", message, color)
 
-    return jsonify({
-        "schemaVersion": 1,
-        "label": "Deployment",
-        "message": message,
-        "color": color
-    })
+def render_snapshot(snapshot: DeploymentSnapshot) -> Dict[str, Dict[str, Any]]:
+    """Every snapshot-derived response payload, sharing one stats computation."""
+    stats = get_deployment_stats(snapshot.argocd_apps, snapshot.pods)
+    return {
+        "status": snapshot.as_dict(),
+        "debug": _debug_payload(snapshot, stats),
+        "badge/argocd": _argocd_badge(stats),
+        "badge/pods": _pods_badge(stats),
+        "badge/health": _health_badge(stats),
+        "badge/deployment": _deployment_badge(snapshot.progress),
+    }
+
+RESPONSE_CACHE = ResponseCache(deployment_state, render_snapshot)
+
+@app.route('/api/debug')
+def debug() -> Response:
+    """Debug endpoint to see detailed pod statuses"""
+    return json_response(*RESPONSE_CACHE.get("debug"))
+
+@app.route('/api/badge/argocd')
+def badge_argocd() -> Response:
+    """Badge endpoint for ArgoCD status"""
+    return json_response(*RESPONSE_CACHE.get("badge/argocd"))
+
+@app.route('/api/badge/pods')
+def badge_pods() -> Response:
+    """Badge endpoint for Pods status"""
+    return json_response(*RESPONSE_CACHE.get("badge/pods"))
+
+@app.route('/api/badge/health')
+def badge_health() -> Response:
+    """Badge endpoint for overall health"""
+    return json_response(*RESPONSE_CACHE.get("badge/health"))
+
+@app.route('/api/badge/deployment')
+def badge_deployment() -> Response:
+    """Badge endpoint for deployment progress"""
+    return json_response(*RESPONSE_CACHE.get("badge/deployment"))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=False)
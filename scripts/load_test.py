@@ -0,0 +1,221 @@
+"""
+Async HTTP load generator for the ML inference service.
+
+Drives /predict, /predict/batch and /metrics at a fixed concurrency and reports
+p50/p95/p99 latency and requests per second for each endpoint as JSON, so runs from
+different commits can be diffed. Without --url a local uvicorn is started on a free port.
+
+    python scripts/load_test.py --concurrency 16 --requests 2000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app" / "ml-inference"
+
+SAMPLE_TEXTS = [
+    "This product is amazing and I love it",
+    "Terrible service, the worst experience ever",
+    "The package arrived on Tuesday",
+    "Great quality but the delivery was slow and bad",
+    "I hate how awful the support was",
+    "Wonderful, fantastic, excellent work",
+]
+
+# name -> (method, path, body factory taking the request sequence number)
+ENDPOINTS: Dict[str, Tuple[str, str, Optional[Callable[[int], Dict[str, Any]]]]] = {
+    "predict": ("POST", "/predict",
+                lambda i: {"text": f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} #{i}"}),
+    "predict_batch": ("POST", "/predict/batch",
+                      lambda i: {"texts": [f"{text} #{i}" for text in SAMPLE_TEXTS]}),
+    "metrics": ("GET", "/metrics", None),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Reduce raw per-request latencies (seconds) to the reported statistics"""
+    ordered = sorted(latencies)
+    total = len(ordered) + errors
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": to_ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50": to_ms(percentile(ordered, 50)),
+            "p95": to_ms(percentile(ordered, 95)),
+            "p99": to_ms(percentile(ordered, 99)),
+            "max": to_ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+
+async def run_endpoint(client: httpx.AsyncClient, name: str, concurrency: int,
+                       total_requests: int) -> Dict[str, Any]:
+    """Issue total_requests against one endpoint from `concurrency` closed-loop workers"""
+    method, path, body = ENDPOINTS[name]
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker() -> None:
+        nonlocal errors, issued
+        while issued < total_requests:
+            sequence = issued
+            issued += 1
+            payload = body(sequence) if body else None
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=payload)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_load_test(base_url: str, endpoints: List[str], concurrency: int,
+                        total_requests: int, warmup: int = 0,
+                        transport: Optional[httpx.AsyncBaseTransport] = None) -> Dict[str, Any]:
+    """Benchmark each endpoint in turn and return the full JSON-ready report"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                 timeout=30.0) as client:
+        results = {}
+        for name in endpoints:
+            if warmup:
+                await run_endpoint(client, name, concurrency, warmup)
+            results[name] = await run_endpoint(client, name, concurrency, total_requests)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": _git_commit(),
+        "target": base_url,
+        "concurrency": concurrency,
+        "requests_per_endpoint": total_requests,
+        "endpoints": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """Current commit hash, so stored results can be matched to the code they measured"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(env: Optional[Dict[str, str]] = None, startup_timeout: float = 30.0) -> Iterator[str]:
+    """Run the service under uvicorn on a free port, yielding its base URL once /ready passes"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR, env={**os.environ, **(env or {})})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for the inference service to become ready")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _print_summary(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<15}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}",
+          file=sys.stderr)
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"{name:<15}{stats['requests_per_second']:>10}{latency['p50']:>10}"
+              f"{latency['p95']:>10}{latency['p99']:>10}{stats['errors']:>8}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Target service; a local uvicorn is started when omitted")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = sorted(set(endpoints) - set(ENDPOINTS))
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    def run(base_url: str) -> Dict[str, Any]:
+        return asyncio.run(run_load_test(base_url, endpoints, args.concurrency,
+                                         args.requests, args.warmup))
+
+    if args.url:
+        report = run(args.url.rstrip("/"))
+    else:
+        with local_server() as base_url:
+            report = run(base_url)
+
+    _print_summary(report)
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n")
+    else:
+        print(rendered)
+    return 1 if any(stats["errors"] for stats in report["endpoints"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
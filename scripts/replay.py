@@ -0,0 +1,240 @@
+"""
+Replay recorded requests against the ML inference service.
+
+Streams a JSONL file of recorded requests and reports latency percentiles, error rate and
+how often the returned sentiment matches the recorded label. Each line is an object like
+
+    {"timestamp": 1700000000.25, "path": "/predict", "body": {"text": "great"}, "expected": "positive"}
+
+`text`/`texts` may stand in for `body`, `label` for `expected` (a list for /predict/batch),
+and `offset_ms` or an ISO 8601 `timestamp` give the send time. Lines that do not describe
+a request are skipped and counted. Without --url a local uvicorn is started.
+
+    python scripts/replay.py traffic.jsonl --mode original --speed 2 --output replay.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from load_test import local_server, summarize
+
+
+class RecordedRequest:
+    """One replayable request parsed from a JSONL line"""
+
+    __slots__ = ("method", "path", "body", "offset", "expected")
+
+    def __init__(self, method: str, path: str, body: Optional[Dict[str, Any]],
+                 offset: Optional[float], expected: Any):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.offset = offset
+        self.expected = expected
+
+
+def _parse_time(record: Dict[str, Any]) -> Optional[float]:
+    """Send time in seconds on an arbitrary but consistent clock"""
+    if "offset_ms" in record:
+        return float(record["offset_ms"]) / 1000
+    timestamp = record.get("timestamp")
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    return None
+
+
+def parse_record(record: Any) -> Optional[RecordedRequest]:
+    """Build a RecordedRequest from a decoded line, or None if it does not describe one"""
+    if not isinstance(record, dict):
+        return None
+    body = record.get("body")
+    if body is None and "text" in record:
+        body = {"text": record["text"]}
+    elif body is None and "texts" in record:
+        body = {"texts": record["texts"]}
+    path = record.get("path") or record.get("endpoint")
+    if path is None:
+        if body is None:
+            return None
+        path = "/predict/batch" if "texts" in body else "/predict"
+    method = str(record.get("method") or ("POST" if body is not None else "GET")).upper()
+    try:
+        offset = _parse_time(record)
+    except (TypeError, ValueError):
+        offset = None
+    return RecordedRequest(method, path, body, offset, record.get("expected", record.get("label")))
+
+
+def read_records(path: Path, stats: Dict[str, int]) -> Iterator[RecordedRequest]:
+    """Lazily yield replayable requests, counting lines that had to be skipped"""
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                request = parse_record(json.loads(line))
+            except json.JSONDecodeError:
+                request = None
+            if request is None:
+                stats["skipped"] += 1
+                continue
+            yield request
+
+
+def _predicted_labels(payload: Any) -> Optional[List[str]]:
+    if not isinstance(payload, dict):
+        return None
+    if "predictions" in payload:
+        return [item.get("sentiment") for item in payload["predictions"]]
+    if "sentiment" in payload:
+        return [payload["sentiment"]]
+    return None
+
+
+class ReplayResult:
+    """Accumulates per-request outcomes for the final report"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.status_codes: Dict[str, int] = {}
+        self.labels_compared = 0
+        self.labels_matched = 0
+        self.lag: List[float] = []
+
+    def record(self, request: RecordedRequest, status: Optional[int], latency: float,
+               payload: Any) -> None:
+        key = str(status) if status is not None else "connection_error"
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+            return
+        self.latencies.append(latency)
+        if request.expected is None:
+            return
+        expected = request.expected if isinstance(request.expected, list) else [request.expected]
+        predicted = _predicted_labels(payload) or []
+        for i, label in enumerate(expected):
+            self.labels_compared += 1
+            if i < len(predicted) and predicted[i] == label:
+                self.labels_matched += 1
+
+
+async def replay(records: Iterator[RecordedRequest], base_url: str, mode: str = "max",
+                 concurrency: int = 8, speed: float = 1.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None) -> Dict[str, Any]:
+    """Send every record and summarize the outcome.
+
+    In "original" mode requests are released at their recorded spacing (divided by speed)
+    and concurrency only caps in-flight requests; in "max" mode they are sent as fast as
+    `concurrency` connections allow.
+    """
+    result = ReplayResult()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def send(client: httpx.AsyncClient, request: RecordedRequest) -> None:
+        started = time.perf_counter()
+        status, payload = None, None
+        try:
+            response = await client.request(request.method, request.path, json=request.body)
+            status = response.status_code
+            if response.headers.get("content-type", "").startswith("application/json"):
+                payload = response.json()
+        except (httpx.HTTPError, ValueError):
+            pass
+        finally:
+            slots.release()
+        result.record(request, status, time.perf_counter() - started, payload)
+
+    tasks = set()
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                 timeout=30.0) as client:
+        started = time.perf_counter()
+        first_offset = None
+        for request in records:
+            if mode == "original" and request.offset is not None:
+                if first_offset is None:
+                    first_offset = request.offset
+                due = started + (request.offset - first_offset) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                result.lag.append(max(0.0, -delay))
+            await slots.acquire()
+            task = asyncio.ensure_future(send(client, request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    report = summarize(result.latencies, result.errors, elapsed)
+    report["status_codes"] = result.status_codes
+    report["labels"] = {
+        "compared": result.labels_compared,
+        "matched": result.labels_matched,
+        "match_rate": round(result.labels_matched / result.labels_compared, 4)
+        if result.labels_compared else None,
+    }
+    if result.lag:
+        report["schedule_lag_ms_max"] = round(max(result.lag) * 1000, 3)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file", type=Path, help="JSONL file of recorded requests")
+    parser.add_argument("--url", help="Target service; a local uvicorn is started when omitted")
+    parser.add_argument("--mode", choices=("original", "max"), default="max",
+                        help="Keep the recorded spacing or send as fast as possible")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Time compression factor for --mode original")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--min-match-rate", type=float,
+                        help="Exit non-zero if the label match rate falls below this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Exit non-zero if the error rate exceeds this")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    def run(base_url: str) -> Dict[str, Any]:
+        stats = {"skipped": 0}
+        report = asyncio.run(replay(read_records(args.file, stats), base_url, args.mode,
+                                    args.concurrency, args.speed))
+        report.update({"file": str(args.file), "mode": args.mode, "target": base_url,
+                       "concurrency": args.concurrency, "skipped_lines": stats["skipped"]})
+        return report
+
+    if args.url:
+        report = run(args.url.rstrip("/"))
+    else:
+        with local_server() as base_url:
+            report = run(base_url)
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n")
+    else:
+        print(rendered)
+
+    failed = report["error_rate"] > args.max_error_rate
+    match_rate = report["labels"]["match_rate"]
+    if args.min_match_rate is not None and (match_rate is None or match_rate < args.min_match_rate):
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,19 +2,43 @@
 Integration tests for the FastAPI ML inference endpoints.
 Tests all API endpoints including health checks, predictions, and metrics.
 """
+import asyncio
+import gc
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 
 # Import the FastAPI app
+import app as app_module
 from app import app, PredictionRequest, BatchPredictionRequest
 
 
 @pytest.fixture
 def client():
-    """Create a test client for the FastAPI app."""
+    """Create a test client for the FastAPI app with its model loaded."""
+    app_module.MODEL_REGISTRY.ensure_loaded()
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    """Start each test with an empty prediction cache and a fresh /metrics render."""
+    app_module.PREDICTION_CACHE.clear()
+    app_module.METRICS_CACHE.clear()
+    yield
+
+
 class TestRootEndpoint:
     """Tests for the root endpoint."""
 
@@ -84,6 +108,46 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "ready"
 
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_ready_not_ready_while_model_loading(self, client, monkeypatch):
+        """Test readiness reports 503 until the model has loaded."""
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "_active", None)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "loading"
+        assert client.get("/health").status_code == 200
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_failed_model_load_reported(self, client, monkeypatch):
+        """Test a failed model load makes /ready report failed and predictions return 503."""
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "_active", None)
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "load_error", None)
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "backend", "missing")
+        response = client.post("/predict", json={"text": "great"})
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Model is not available"
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert "Unknown MODEL_BACKEND" in response.json()["error"]
+        assert client.post("/predict/batch", json={"texts": ["great"]}).status_code == 503
+        assert client.post("/predict/stream", content=b'{"text": "great"}\n').status_code == 503
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_startup_loads_model(self, monkeypatch):
+        """Test app startup loads the model in the background and becomes ready."""
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "_active", None)
+        with TestClient(app) as client:
+            deadline = time.monotonic() + 5
+            while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert client.get("/ready").json()["status"] == "ready"
+            assert "model_load_duration_seconds" in client.get("/metrics").text
+
     @pytest.mark.api
     @pytest.mark.integration
     def test_health_contains_timestamp(self, client):
@@ -235,6 +299,25 @@ class TestBatchPredictEndpoint:
         response = client.post("/predict/batch", json={"texts": []})
         assert response.status_code == 422
 
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_batch_predict_matches_single_predictions(self, client):
+        """Test batch sentiments and confidences match single predictions."""
+        texts = ["This is amazing", "This is terrible", "The weather is cloudy"]
+        batch = client.post("/predict/batch", json={"texts": texts}).json()
+        for text, pred in zip(texts, batch["predictions"]):
+            single = client.post("/predict", json={"text": text}).json()
+            assert pred["sentiment"] == single["sentiment"]
+            assert pred["confidence"] == single["confidence"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_batch_predict_shares_timestamp(self, client):
+        """Test that all predictions in a batch share one timestamp."""
+        response = client.post("/predict/batch", json={"texts": ["a", "b", "c"]})
+        timestamps = {pred["timestamp"] for pred in response.json()["predictions"]}
+        assert len(timestamps) == 1
+
     @pytest.mark.api
     @pytest.mark.integration
     def test_batch_total_time_positive(self, client):
@@ -244,6 +327,876 @@ class TestBatchPredictEndpoint:
         assert data["total_processing_time_ms"] > 0
 
 
+def _ndjson(items):
+    """Encode a list of objects as an NDJSON request body."""
+    return "".join(json.dumps(item) + "\n" for item in items)
+
+
+class TestMicroBatching:
+    """Tests for micro-batching of concurrent /predict calls."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_concurrent_predictions_coalesced(self, monkeypatch):
+        """Test parallel predictions are scored in fewer batches than requests."""
+        monkeypatch.setattr(app_module, "MICRO_BATCHING", True)
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0.05)
+        n_requests = 16
+        size_before = REGISTRY.get_sample_value("inference_microbatch_size_sum") or 0.0
+        count_before = REGISTRY.get_sample_value("inference_microbatch_size_count") or 0.0
+
+        async def run_parallel():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(*[
+                    ac.post("/predict", json={"text": f"wonderful {i}"})
+                    for i in range(n_requests)
+                ])
+
+        responses = asyncio.run(run_parallel())
+
+        assert all(r.status_code == 200 for r in responses)
+        assert all(r.json()["sentiment"] == "positive" for r in responses)
+        batches = REGISTRY.get_sample_value("inference_microbatch_size_count") - count_before
+        assert REGISTRY.get_sample_value("inference_microbatch_size_sum") - size_before == n_requests
+        assert batches < n_requests
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_microbatch_metrics_exposed(self, client, monkeypatch):
+        """Test micro-batch histograms appear in the Prometheus output."""
+        monkeypatch.setattr(app_module, "MICRO_BATCHING", True)
+        client.post("/predict", json={"text": "superb"})
+        content = client.get("/metrics").text
+        assert "inference_microbatch_size_bucket" in content
+        assert "inference_microbatch_queue_wait_seconds_bucket" in content
+
+
+class TestStreamPredictEndpoint:
+    """Tests for the NDJSON streaming prediction endpoint."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_returns_ndjson(self, client):
+        """Test stream endpoint returns one NDJSON prediction per input line."""
+        body = _ndjson([{"text": "amazing"}, {"text": "terrible"}, {"text": "cloudy"}])
+        response = client.post("/predict/stream", content=body)
+        assert response.status_code == 200
+        assert "application/x-ndjson" in response.headers["content-type"]
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [p["sentiment"] for p in lines] == ["positive", "negative", "neutral"]
+        assert set(lines[0]) == {
+            "text", "sentiment", "confidence", "processing_time_ms", "timestamp", "model_version"
+        }
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_exceeds_batch_limit(self, client, monkeypatch):
+        """Test stream accepts far more texts than the batch limit, across chunks."""
+        monkeypatch.setattr(app_module, "STREAM_CHUNK_SIZE", 64)
+        texts = [f"great item {i}" for i in range(1000)]
+        response = client.post("/predict/stream", content=_ndjson({"text": t} for t in texts))
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [p["text"] for p in lines] == texts
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_chunked_request_body(self, client):
+        """Test lines split across request body chunks are reassembled."""
+        def body():
+            yield b'{"text": "awe'
+            yield b'some"}\n{"te'
+            yield b'xt": "awful"}'
+
+        response = client.post("/predict/stream", content=body())
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [p["text"] for p in lines] == ["awesome", "awful"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_invalid_lines_reported_in_order(self, client):
+        """Test invalid lines yield error entries without failing the stream."""
+        body = '{"text": "good"}\nnot json\n\n{"text": ""}\n{"nope": 1}\n{"text": "bad"}\n'
+        response = client.post("/predict/stream", content=body)
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["sentiment"] == "positive"
+        assert [entry["line"] for entry in lines[1:4]] == [2, 4, 5]
+        assert all("error" in entry for entry in lines[1:4])
+        assert lines[4]["sentiment"] == "negative"
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_oversized_line_rejected(self, client):
+        """Test a line beyond the size bound is discarded with an error."""
+        huge = json.dumps({"text": "a" * (app_module._MAX_STREAM_LINE_BYTES + 10)})
+        body = huge + "\n" + json.dumps({"text": "lovely"}) + "\n"
+        response = client.post("/predict/stream", content=body)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"line": 1, "error": "Line too long"}
+        assert lines[1]["sentiment"] == "positive"
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stream_records_metrics(self, client):
+        """Test stream requests are counted under the stream endpoint label."""
+        client.post("/predict/stream", content=_ndjson([{"text": "good"}]))
+        content = client.get("/metrics").text
+        assert 'inference_requests_total{endpoint="stream",status="success"}' in content
+        assert 'inference_request_duration_seconds_count{endpoint="stream"}' in content
+
+
+class TestConcurrentPredictions:
+    """Tests that inference does not block the event loop."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_parallel_predictions_overlap(self, monkeypatch):
+        """Test N parallel predictions finish in about one latency period."""
+        latency = 0.1
+        n_requests = 10
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", latency)
+
+        async def run_parallel():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                start = time.perf_counter()
+                responses = await asyncio.gather(*[
+                    ac.post("/predict", json={"text": f"amazing request {i}"})
+                    for i in range(n_requests)
+                ])
+                return responses, time.perf_counter() - start
+
+        responses, elapsed = asyncio.run(run_parallel())
+
+        assert all(r.status_code == 200 for r in responses)
+        assert elapsed < latency * n_requests / 2
+
+
+class TestAdmissionControl:
+    """Tests for the in-flight limit, admission queue and load shedding."""
+
+    @pytest.mark.unit
+    def test_queue_full_is_429(self):
+        """Test requests beyond capacity and queue are shed immediately."""
+        controller = app_module.AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=1)
+
+        async def acquire_three():
+            return [await controller.acquire() for _ in range(3)]
+
+        assert asyncio.run(acquire_three()) == [None, None, 429]
+        assert controller.in_flight == 2
+
+    @pytest.mark.unit
+    def test_queue_timeout_is_503(self):
+        """Test a queued request is shed once it waits longer than the queue timeout."""
+        controller = app_module.AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+
+        async def acquire_two():
+            await controller.acquire()
+            start = time.perf_counter()
+            status = await controller.acquire()
+            return status, time.perf_counter() - start
+
+        status, waited = asyncio.run(acquire_two())
+        assert status == 503
+        assert waited >= 0.05
+        assert controller.queue_depth == 0
+
+    @pytest.mark.unit
+    def test_released_slots_go_to_waiters_in_order(self):
+        """Test a released slot is handed to the oldest waiter."""
+        controller = app_module.AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1)
+        order = []
+
+        async def waiter(name):
+            assert await controller.acquire() is None
+            order.append(name)
+
+        async def run():
+            await controller.acquire()
+            tasks = [asyncio.ensure_future(waiter(name)) for name in ("first", "second")]
+            await asyncio.sleep(0)
+            controller.release()
+            await asyncio.sleep(0)
+            controller.release()
+            await asyncio.gather(*tasks)
+            controller.release()
+
+        asyncio.run(run())
+        assert order == ["first", "second"]
+        assert controller.in_flight == 0
+
+    @pytest.mark.unit
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test a queued request that disconnects gives up its place."""
+        controller = app_module.AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+
+        async def run():
+            await controller.acquire()
+            queued = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0)
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            controller.release()
+
+        asyncio.run(run())
+        assert controller.in_flight == 0
+        assert controller.queue_depth == 0
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_overload_is_shed_with_retry_after(self, monkeypatch):
+        """Test requests beyond capacity get a fast 429 while probes stay available."""
+        app_module.MODEL_REGISTRY.ensure_loaded()
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0.2)
+        monkeypatch.setattr(app_module, "ADMISSION_CONTROLLER",
+                            app_module.AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=1))
+
+        async def overload():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                predictions = asyncio.gather(*[
+                    ac.post("/predict", json={"text": f"busy {i}"}) for i in range(5)
+                ])
+                await asyncio.sleep(0.05)
+                probes = [await ac.get(path) for path in ("/health", "/ready", "/metrics")]
+                return await predictions, probes
+
+        responses, probes = asyncio.run(overload())
+        statuses = sorted(r.status_code for r in responses)
+        assert statuses == [200, 200, 429, 429, 429]
+        shed = next(r for r in responses if r.status_code == 429)
+        assert shed.headers["retry-after"] == str(app_module.ADMISSION_RETRY_AFTER_SECONDS)
+        assert all(probe.status_code == 200 for probe in probes)
+        assert app_module.ADMISSION_CONTROLLER.in_flight == 0
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_slots_released_after_errors(self, client, monkeypatch):
+        """Test rejected and failed requests give their slot back."""
+        monkeypatch.setattr(app_module, "ADMISSION_CONTROLLER",
+                            app_module.AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1))
+        assert client.post("/predict", json={"text": ""}).status_code == 422
+        assert client.get("/no-such-endpoint").status_code == 404
+        assert client.post("/predict", json={"text": "good"}).status_code == 200
+        assert app_module.ADMISSION_CONTROLLER.in_flight == 0
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_shed_metrics_exposed(self, client):
+        """Test shed requests and queue depth appear in the Prometheus output."""
+        content = client.get("/metrics").text
+        assert "inference_admission_queue_depth" in content
+        assert "inference_requests_shed_total" in content
+
+
+def _monitor(**limits):
+    """A SaturationMonitor with only the given limits enabled."""
+    return app_module.SaturationMonitor(limits=limits, recovery_ratio=0.8, window_seconds=30)
+
+
+class TestSaturationReadiness:
+    """Tests for readiness tied to saturation signals."""
+
+    @pytest.mark.unit
+    def test_hysteresis(self):
+        """Test saturation starts at the limit and clears only below limit * recovery ratio."""
+        monitor = _monitor(loop_lag_ms=100)
+        monitor.loop_lag = 0.1
+        assert monitor.check()[0] is True
+        monitor.loop_lag = 0.09
+        assert monitor.check()[0] is True
+        monitor.loop_lag = 0.079
+        assert monitor.check()[0] is False
+        monitor.loop_lag = 0.09
+        assert monitor.check()[0] is False
+
+    @pytest.mark.unit
+    def test_p95_over_window(self):
+        """Test p95 covers recent requests and expires old ones."""
+        monitor = app_module.SaturationMonitor(limits={}, recovery_ratio=0.8, window_seconds=0.05)
+        for i in range(100):
+            monitor.observe_latency(i / 1000)
+        assert monitor.p95() == pytest.approx(0.095)
+        time.sleep(0.06)
+        assert monitor.p95() == 0.0
+
+    @pytest.mark.unit
+    def test_loop_lag_is_smoothed(self):
+        """Test a single slow loop iteration does not dominate the lag signal."""
+        monitor = _monitor()
+        monitor.observe_loop_lag(1.0)
+        assert 0 < monitor.loop_lag < 0.5
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_ready_fails_while_saturated(self, client, monkeypatch):
+        """Test /ready returns 503 with the offending signals when latency is over its limit."""
+        monkeypatch.setattr(app_module, "SATURATION_MONITOR", _monitor(p95_ms=0.001))
+        assert client.post("/predict", json={"text": "good"}).status_code == 200
+        response = client.get("/ready")
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "saturated"
+        assert data["limits_exceeded"] == ["p95_ms"]
+        assert set(data["saturation"]) == {"in_flight", "queue_depth", "loop_lag_ms", "p95_ms"}
+        assert client.get("/health").status_code == 200
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_ready_fails_at_in_flight_limit(self, client, monkeypatch):
+        """Test a worker with every admission slot busy reports not ready."""
+        controller = app_module.AdmissionController(max_in_flight=4, max_queue=4, queue_timeout=1)
+        controller.in_flight = 4
+        monkeypatch.setattr(app_module, "ADMISSION_CONTROLLER", controller)
+        monkeypatch.setattr(app_module, "SATURATION_MONITOR", _monitor(in_flight=4))
+        assert client.get("/ready").status_code == 503
+        controller.in_flight = 3
+        assert client.get("/ready").status_code == 200
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_adaptive_readiness_can_be_disabled(self, client, monkeypatch):
+        """Test saturation is ignored when ADAPTIVE_READINESS is off."""
+        monitor = _monitor(loop_lag_ms=1)
+        monitor.loop_lag = 1.0
+        monkeypatch.setattr(app_module, "SATURATION_MONITOR", monitor)
+        monkeypatch.setattr(app_module, "ADAPTIVE_READINESS", False)
+        assert client.get("/ready").status_code == 200
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_loop_lag_sampled_while_running(self, monkeypatch):
+        """Test the lag sampler runs between startup and shutdown."""
+        monkeypatch.setattr(app_module, "LOOP_LAG_INTERVAL_SECONDS", 0.01)
+        with TestClient(app):
+            assert app_module._loop_lag_task is not None
+            assert not app_module._loop_lag_task.done()
+        assert app_module._loop_lag_task is None
+
+
+def _histogram_sample(histogram, suffix, **labels):
+    """Read one sample (e.g. _sum or _count) of a histogram from the default registry."""
+    name = histogram._name + suffix
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestRuntimeMonitoring:
+    """Tests for event-loop lag and GC pause monitoring."""
+
+    @pytest.mark.unit
+    def test_blocking_call_shows_up_as_loop_lag(self, monkeypatch, caplog):
+        """Test a blocking call on the event loop is recorded and logged as lag."""
+        monkeypatch.setattr(app_module, "LOOP_LAG_WARN_MS", 50)
+        before = _histogram_sample(app_module.EVENT_LOOP_LAG, "_sum")
+
+        async def block_loop():
+            monitor = asyncio.ensure_future(app_module._monitor_loop_lag(0.01))
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # Blocks the loop like a synchronous call in a handler would
+            await asyncio.sleep(0.03)
+            monitor.cancel()
+
+        with caplog.at_level(logging.WARNING, logger="app"):
+            asyncio.run(block_loop())
+        assert _histogram_sample(app_module.EVENT_LOOP_LAG, "_sum") - before >= 0.08
+        assert any("Event loop blocked" in record.message for record in caplog.records)
+
+    @pytest.mark.unit
+    def test_gc_pauses_recorded_by_generation(self):
+        """Test collector runs are timed and exported per generation."""
+        recorder = app_module.GCPauseRecorder()
+        before = _histogram_sample(app_module.GC_PAUSE, "_count", generation="2")
+        recorder.install()
+        try:
+            gc.collect()
+        finally:
+            recorder.uninstall()
+        assert recorder not in gc.callbacks
+        assert recorder.drain() >= 1
+        assert _histogram_sample(app_module.GC_PAUSE, "_count", generation="2") == before + 1
+
+    @pytest.mark.unit
+    def test_unmatched_gc_stop_is_ignored(self):
+        """Test a stop without a start (recorder installed mid-collection) records nothing."""
+        recorder = app_module.GCPauseRecorder()
+        recorder("stop", {"generation": 0, "collected": 0, "uncollectable": 0})
+        assert recorder.drain() == 0
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_runtime_metrics_exposed(self, client):
+        """Test loop lag and GC pause histograms appear in the Prometheus output."""
+        content = client.get("/metrics").text
+        assert "event_loop_lag_seconds_bucket" in content
+        assert "python_gc_pause_seconds" in content
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestAutoscalingSignals:
+    """Tests for the rolling-window autoscaling signals."""
+
+    @staticmethod
+    def _signals(clock):
+        return app_module.AutoscalingSignals(window_seconds=60, slo_latency=0.25, slo_target=0.99,
+                                             clock=clock)
+
+    @staticmethod
+    def _load(signals, clock, seconds, rate, slow_every=0):
+        """Synthetic load: `rate` requests per second for `seconds` seconds."""
+        for _ in range(seconds):
+            for i in range(rate):
+                slow = slow_every and i % slow_every == 0
+                signals.observe(0.5 if slow else 0.01)
+            clock.now += 1
+
+    @pytest.mark.unit
+    def test_request_rate_rises_and_falls(self):
+        """Test the smoothed rate follows load up and decays once it stops."""
+        clock = FakeClock()
+        signals = self._signals(clock)
+        assert signals.snapshot()["requests_per_second"] == 0
+
+        self._load(signals, clock, seconds=60, rate=10)
+        assert signals.snapshot()["requests_per_second"] == pytest.approx(10, rel=0.05)
+
+        self._load(signals, clock, seconds=30, rate=30)
+        assert signals.snapshot()["requests_per_second"] == pytest.approx(20, rel=0.05)
+
+        clock.now += 30
+        assert signals.snapshot()["requests_per_second"] == pytest.approx(15, rel=0.05)
+        clock.now += 31
+        assert signals.snapshot()["requests_per_second"] == 0
+
+    @pytest.mark.unit
+    def test_rate_is_not_diluted_during_first_window(self):
+        """Test a freshly started worker reports its actual rate before a full window."""
+        clock = FakeClock()
+        signals = self._signals(clock)
+        self._load(signals, clock, seconds=5, rate=8)
+        assert signals.snapshot()["requests_per_second"] == pytest.approx(8)
+
+    @pytest.mark.unit
+    def test_slo_burn_ratio(self):
+        """Test burn ratio is the miss rate relative to the error budget, shed requests included."""
+        clock = FakeClock()
+        signals = self._signals(clock)
+        self._load(signals, clock, seconds=10, rate=100, slow_every=100)
+        assert signals.snapshot()["slo_burn_ratio"] == pytest.approx(1.0)
+
+        for _ in range(50):
+            signals.observe(0.0, shed=True)
+        assert signals.snapshot()["slo_burn_ratio"] == pytest.approx(60 / 1050 / 0.01, rel=0.01)
+
+        clock.now += 61
+        assert signals.snapshot()["slo_burn_ratio"] == 0.0
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_endpoint_reflects_traffic(self, client, monkeypatch):
+        """Test requests through the service move the exported signals."""
+        clock = FakeClock()
+        monkeypatch.setattr(app_module, "AUTOSCALING_SIGNALS", self._signals(clock))
+        for i in range(12):
+            client.post("/predict", json={"text": f"scaling {i}"})
+        client.get("/health")  # Probes are not demand
+        client.get("/openapi.json")  # Neither are docs or unknown paths
+        client.get("/predict/unknown")
+
+        snapshot = client.get("/metrics/autoscaling").json()
+        assert snapshot["requests_per_second"] == 12
+        assert snapshot["concurrency"] == 0
+        assert snapshot["window_seconds"] == 60
+        content = client.get("/metrics").text
+        assert "inference_autoscaling_requests_per_second 12.0" in content
+        assert "inference_autoscaling_slo_burn_ratio" in content
+
+        clock.now += 61
+        assert client.get("/metrics/autoscaling").json()["requests_per_second"] == 0
+
+
+class TestModelBackendSelection:
+    """Tests that endpoints use the configured model backend."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_endpoints_use_active_model(self, client, monkeypatch):
+        """Test /predict and /predict/batch score with the active backend."""
+        model = app_module.HashedLinearModel.from_lexicon(app_module.LEXICON)
+        monkeypatch.setattr(app_module.MODEL_REGISTRY, "_active", (model, "linear-test"))
+        single = client.post("/predict", json={"text": "amazing wonderful"}).json()
+        assert (single["sentiment"], single["confidence"]) == model.predict("amazing wonderful")
+        batch = client.post("/predict/batch", json={"texts": ["terrible awful"]}).json()
+        prediction = batch["predictions"][0]
+        assert (prediction["sentiment"], prediction["confidence"]) == model.predict("terrible awful")
+
+
+class TestModelVersioning:
+    """Tests that responses report the model version that served them."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_responses_include_model_version(self, client):
+        """Test single and batch responses carry the active model version."""
+        version = app_module.MODEL_REGISTRY.active[1]
+        assert client.post("/predict", json={"text": "good"}).json()["model_version"] == version
+        batch = client.post("/predict/batch", json={"texts": ["good"]}).json()
+        assert batch["predictions"][0]["model_version"] == version
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_swapped_version_serves_new_requests(self, client, monkeypatch):
+        """Test a newly activated version serves new requests and bypasses old cache entries."""
+        registry = app_module.MODEL_REGISTRY
+        monkeypatch.setattr(registry, "_active", registry.active)
+        assert client.post("/predict", json={"text": "gitops"}).json()["sentiment"] == "neutral"
+
+        custom = app_module.LexiconModel(app_module.CompiledLexicon({"gitops": 1}))
+        registry.activate(custom, "custom-v2")
+        data = client.post("/predict", json={"text": "gitops"}).json()
+        assert data["model_version"] == "custom-v2"
+        assert data["sentiment"] == "positive"
+        content = client.get("/metrics").text
+        assert 'model_predictions_total{model_version="custom-v2"} 1.0' in content
+        assert 'model_inference_duration_seconds_count{model_version="custom-v2"}' in content
+
+
+class TestPredictionCaching:
+    """Tests for prediction cache use in the endpoints."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_cache_hit_skips_inference_delay(self, client, monkeypatch):
+        """Test a repeated text is served without the simulated latency."""
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0.2)
+        first = client.post("/predict", json={"text": "Lovely service"}).json()
+        start = time.perf_counter()
+        second = client.post("/predict", json={"text": "lovely service "}).json()
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.2
+        assert second["sentiment"] == first["sentiment"]
+        assert second["confidence"] == first["confidence"]
+        assert second["text"] == "lovely service "
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_batch_uses_cache(self, client):
+        """Test batch predictions populate and read the shared cache."""
+        client.post("/predict", json={"text": "great"})
+        hits_before = REGISTRY.get_sample_value("inference_cache_hits_total")
+        response = client.post("/predict/batch", json={"texts": ["great", "awful"]})
+        assert response.status_code == 200
+        assert REGISTRY.get_sample_value("inference_cache_hits_total") == hits_before + 1
+        version = response.json()["predictions"][0]["model_version"]
+        assert app_module.PREDICTION_CACHE.get("awful", version) == ("negative", 0.7)
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_cache_metrics_exposed(self, client):
+        """Test cache metrics appear in the Prometheus output."""
+        client.post("/predict", json={"text": "test"})
+        content = client.get("/metrics").text
+        assert "inference_cache_hits_total" in content
+        assert "inference_cache_misses_total" in content
+        assert "inference_cache_size 1.0" in content
+
+
+def _server_timing(response):
+    """Parse a Server-Timing header into {stage: milliseconds}."""
+    entries = (entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+    return {name: float(duration) for name, duration in entries}
+
+
+class TestStageTiming:
+    """Tests for per-stage latency instrumentation."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_no_server_timing_header_by_default(self, client):
+        """Test the Server-Timing header is opt-in."""
+        response = client.post("/predict", json={"text": "great"})
+        assert "server-timing" not in response.headers
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_predict_server_timing_stages(self, client, monkeypatch):
+        """Test a scored prediction reports every pipeline stage."""
+        monkeypatch.setattr(app_module, "SERVER_TIMING", True)
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0.02)
+        stages = _server_timing(client.post("/predict", json={"text": "great"}))
+        assert list(stages) == ["parse", "cache", "queue", "score", "simulated_latency",
+                                "serialize", "total"]
+        assert stages["simulated_latency"] >= 20
+        assert sum(duration for name, duration in stages.items() if name != "total") \
+            == pytest.approx(stages["total"], abs=0.01)
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_cache_hit_has_no_scoring_stages(self, client, monkeypatch):
+        """Test a cached prediction only reports parse, cache and serialize."""
+        monkeypatch.setattr(app_module, "SERVER_TIMING", True)
+        client.post("/predict", json={"text": "great"})
+        stages = _server_timing(client.post("/predict", json={"text": "great"}))
+        assert list(stages) == ["parse", "cache", "serialize", "total"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_batch_and_microbatch_stages(self, client, monkeypatch):
+        """Test batch and micro-batched predictions report their stages."""
+        monkeypatch.setattr(app_module, "SERVER_TIMING", True)
+        batch = _server_timing(client.post("/predict/batch", json={"texts": ["good", "bad"]}))
+        assert {"parse", "cache", "queue", "score", "serialize"} <= set(batch)
+
+        monkeypatch.setattr(app_module, "MICRO_BATCHING", True)
+        single = _server_timing(client.post("/predict", json={"text": "lovely"}))
+        assert list(single) == ["parse", "cache", "microbatch", "serialize", "total"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_untimed_endpoints_have_no_header(self, client, monkeypatch):
+        """Test endpoints outside the inference pipeline are not instrumented."""
+        monkeypatch.setattr(app_module, "SERVER_TIMING", True)
+        assert "server-timing" not in client.get("/health").headers
+        assert "server-timing" not in client.get("/metrics").headers
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_stage_histogram_exposed(self, client):
+        """Test stage durations are recorded in the Prometheus histogram."""
+        client.post("/predict", json={"text": "great"})
+        content = client.get("/metrics").text
+        for stage in ("parse", "cache", "score", "serialize"):
+            assert f'inference_stage_duration_seconds_count{{stage="{stage}"}}' in content
+
+
+def _spin(stop):
+    """Busy loop for the profiler to find."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestDebugProfile:
+    """Tests for the on-demand sampling profiler endpoint."""
+
+    AUTH = {"Authorization": "Bearer s3cret"}
+
+    @pytest.fixture
+    def profiling(self, monkeypatch):
+        """Enable profiling with a token, as a deployment has to."""
+        monkeypatch.setattr(app_module, "DEBUG_PROFILING", True)
+        monkeypatch.setattr(app_module, "DEBUG_PROFILING_TOKEN", "s3cret")
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_disabled_by_default(self, client):
+        """Test the profiler endpoint does not exist unless enabled."""
+        response = client.get("/debug/profile", params={"seconds": 0.1})
+        assert response.status_code == 404
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_returns_collapsed_stacks(self, client, profiling):
+        """Test a profile contains the stack of a busy thread in collapsed format."""
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            response = client.get("/debug/profile", params={"seconds": 0.2, "interval_ms": 5},
+                                  headers=self.AUTH)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["x-profile-samples"]) >= 10
+        lines = response.text.splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1
+        busy = [line for line in lines if line.startswith("busy-worker;")]
+        assert busy and "_spin (test_api.py:" in busy[0]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_token_required(self, client, profiling):
+        """Test the configured token must be presented as a bearer token."""
+        params = {"seconds": 0.05}
+        assert client.get("/debug/profile", params=params).status_code == 403
+        assert client.get("/debug/profile", params=params,
+                          headers={"Authorization": "Bearer wrong"}).status_code == 403
+        assert client.get("/debug/profile", params=params, headers=self.AUTH).status_code == 200
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_disabled_without_token(self, client, monkeypatch):
+        """Test DEBUG_PROFILING alone does not expose the profiler."""
+        monkeypatch.setattr(app_module, "DEBUG_PROFILING", True)
+        monkeypatch.setattr(app_module, "DEBUG_PROFILING_TOKEN", "")
+        response = client.get("/debug/profile", params={"seconds": 0.05},
+                              headers={"Authorization": "Bearer "})
+        assert response.status_code == 404
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_subject_to_admission_control(self, client, profiling, monkeypatch):
+        """Test profiling requests are shed when no admission slot is free."""
+        controller = app_module.AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+        controller.in_flight = 1  # The only slot is taken by another request
+        monkeypatch.setattr(app_module, "ADMISSION_CONTROLLER", controller)
+        response = client.get("/debug/profile", params={"seconds": 0.05}, headers=self.AUTH)
+        assert response.status_code == 429
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_duration_is_bounded(self, client, profiling, monkeypatch):
+        """Test profiles longer than MAX_PROFILE_SECONDS or non-positive are rejected."""
+        monkeypatch.setattr(app_module, "MAX_PROFILE_SECONDS", 1)
+        for params in ({"seconds": 2}, {"seconds": 0}, {"interval_ms": 0.1}):
+            assert client.get("/debug/profile", params=params, headers=self.AUTH).status_code == 422
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_one_profile_at_a_time(self, profiling):
+        """Test a second profile request is refused while one is running."""
+
+        async def profile_twice():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                         headers=self.AUTH) as ac:
+                first = asyncio.ensure_future(ac.get("/debug/profile", params={"seconds": 0.3}))
+                await asyncio.sleep(0.1)
+                second = await ac.get("/debug/profile", params={"seconds": 0.1})
+                return await first, second
+
+        first, second = asyncio.run(profile_twice())
+        assert first.status_code == 200
+        assert second.status_code == 409
+
+
+class TestFastJSONResponses:
+    """Tests for the opt-in orjson response path."""
+
+    @staticmethod
+    def _strip_timing(data):
+        """Drop fields that differ between any two calls."""
+        if "predictions" in data:
+            return [TestFastJSONResponses._strip_timing(p) for p in data["predictions"]]
+        return {k: v for k, v in data.items() if k not in ("processing_time_ms", "timestamp")}
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_fast_json_same_wire_schema(self, client, monkeypatch):
+        """Test fast responses match the PredictionResponse wire schema."""
+        request = {"text": "This café is lovely"}
+        default = client.post("/predict", json=request)
+        monkeypatch.setattr(app_module, "FAST_JSON_RESPONSES", True)
+        app_module.PREDICTION_CACHE.clear()
+        fast = client.post("/predict", json=request)
+        assert fast.headers["content-type"] == "application/json"
+        assert list(fast.json()) == list(default.json())
+        assert self._strip_timing(fast.json()) == self._strip_timing(default.json())
+        app_module.PredictionResponse(**fast.json())
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_fast_json_batch_same_wire_schema(self, client, monkeypatch):
+        """Test fast batch responses match the BatchPredictionResponse wire schema."""
+        request = {"texts": ["great", "awful", "cloudy"]}
+        default = client.post("/predict/batch", json=request)
+        monkeypatch.setattr(app_module, "FAST_JSON_RESPONSES", True)
+        app_module.PREDICTION_CACHE.clear()
+        fast = client.post("/predict/batch", json=request)
+        assert self._strip_timing(fast.json()) == self._strip_timing(default.json())
+        app_module.BatchPredictionResponse(**fast.json())
+
+
+_WORKER_SCRIPT = """
+import sys
+sys.path.insert(0, {app_dir!r})
+from fastapi.testclient import TestClient
+from app import app
+client = TestClient(app)
+for i in range({n_requests}):
+    client.post("/predict", json={{"text": "worker text %d" % i}})
+print(client.get("/metrics").text)
+"""
+
+
+class TestMultiprocessMetrics:
+    """Tests for metrics aggregation across worker processes."""
+
+    @pytest.mark.slow
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_metrics_aggregate_across_workers(self, tmp_path):
+        """Test /metrics in any worker reports requests served by all workers."""
+        app_dir = str(Path(app_module.__file__).parent)
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+               "SIMULATED_LATENCY_SECONDS": "0"}
+
+        outputs = []
+        for n_requests in (3, 5):
+            script = _WORKER_SCRIPT.format(app_dir=app_dir, n_requests=n_requests)
+            result = subprocess.run([sys.executable, "-c", script], env=env,
+                                    capture_output=True, text=True, timeout=60, check=True)
+            outputs.append(result.stdout)
+
+        assert 'inference_requests_total{endpoint="predict",status="success"} 3.0' in outputs[0]
+        assert 'inference_requests_total{endpoint="predict",status="success"} 8.0' in outputs[1]
+
+
+    @pytest.mark.slow
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_gunicorn_workers_share_metrics(self):
+        """Test a real two-worker gunicorn exposes counters summed over both workers."""
+        app_dir = Path(app_module.__file__).parent
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        # PROMETHEUS_MULTIPROC_DIR is left unset so gunicorn.conf.py has to provide it
+        env = {key: value for key, value in os.environ.items() if key != "PROMETHEUS_MULTIPROC_DIR"}
+        env.update({"WEB_CONCURRENCY": "2", "PORT": str(port), "SIMULATED_LATENCY_SECONDS": "0"})
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+             "app:app"], cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                assert process.poll() is None, "gunicorn exited during startup"
+                try:
+                    if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                assert time.monotonic() < deadline, "gunicorn did not start"
+                time.sleep(0.1)
+
+            n_requests = 20
+            for i in range(n_requests):
+                # A new connection per request lets either worker accept it
+                response = httpx.post(f"{base_url}/predict", json={"text": f"great {i}"})
+                assert response.status_code == 200
+
+            sample = f'inference_requests_total{{endpoint="predict",status="success"}} {float(n_requests)}'
+            for _ in range(6):
+                assert sample in httpx.get(f"{base_url}/metrics").text
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+
 class TestMetricsEndpoint:
     """Tests for the Prometheus metrics endpoint."""
 
@@ -272,6 +1225,91 @@ class TestMetricsEndpoint:
         assert "inference" in content.lower()
 
 
+class TestMetricsExposition:
+    """Tests for cached and negotiated /metrics rendering."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_gzip_encoding(self, client):
+        """Test the exposition is gzipped when the scraper accepts it."""
+        response = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "inference_requests_total" in response.text
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    @pytest.mark.parametrize("accept_encoding", ["identity", "gzip;q=0", "br, gzip; q=0.0", "*;q=0"])
+    def test_gzip_refused(self, client, accept_encoding):
+        """Test the exposition is sent uncompressed unless gzip is actually acceptable."""
+        response = client.get("/metrics", headers={"Accept-Encoding": accept_encoding})
+        assert "content-encoding" not in response.headers
+        assert "inference_requests_total" in response.text
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    @pytest.mark.parametrize("accept_encoding", ["GZIP;q=0.5", "br;q=1, *;q=0.1", "deflate, gzip"])
+    def test_gzip_accepted(self, client, accept_encoding):
+        """Test gzip is negotiated case-insensitively, with q-values and via a wildcard."""
+        response = client.get("/metrics", headers={"Accept-Encoding": accept_encoding})
+        assert response.headers["content-encoding"] == "gzip"
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_openmetrics_negotiation(self, client):
+        """Test OpenMetrics is served when requested and Prometheus text otherwise."""
+        response = client.get(
+            "/metrics", headers={"Accept": "application/openmetrics-text; version=1.0.0"})
+        assert response.headers["content-type"].startswith("application/openmetrics-text")
+        assert response.text.endswith("# EOF\n")
+        plain = client.get("/metrics")
+        assert plain.headers["content-type"].startswith("text/plain")
+        assert "# EOF" not in plain.text
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_render_is_reused_within_ttl(self, client, monkeypatch):
+        """Test scrapes within the cache interval see the same render."""
+        monkeypatch.setattr(app_module.METRICS_CACHE, "ttl_seconds", 60)
+        first = client.get("/metrics").text
+        client.post("/predict", json={"text": "rendered later"})
+        assert client.get("/metrics").text == first
+
+        monkeypatch.setattr(app_module.METRICS_CACHE, "ttl_seconds", 0)
+        assert client.get("/metrics").text != first
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_concurrent_scrapes_share_one_render(self, monkeypatch):
+        """Test simultaneous scrapes of a stale exposition render it once."""
+        renders = []
+        real_registry = app_module._metrics_registry
+
+        def counting_registry():
+            renders.append(1)
+            return real_registry()
+
+        monkeypatch.setattr(app_module, "_metrics_registry", counting_registry)
+        monkeypatch.setattr(app_module.METRICS_CACHE, "ttl_seconds", 0)
+
+        async def scrape_all():
+            return await asyncio.gather(*[app_module.METRICS_CACHE.get("", False) for _ in range(5)])
+
+        results = asyncio.run(scrape_all())
+        assert len(renders) == 1
+        assert len({body for body, _ in results}) == 1
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_render_duration_exposed(self, client):
+        """Test the cost of rendering is itself exported."""
+        client.get("/metrics")
+        app_module.METRICS_CACHE.clear()
+        content = client.get("/metrics").text
+        assert 'metrics_render_duration_seconds_count{format="text"}' in content
+
+
 class TestInputValidation:
     """Tests for input validation."""
 
@@ -0,0 +1,282 @@
+"""
+Benchmark suite for the inference service.
+
+Micro-benchmarks use pytest-benchmark and are skipped when the plugin is not installed;
+run them with `pytest tests/test_benchmarks.py -m benchmark --benchmark-json=bench.json`.
+The load generator and replay tests exercise scripts/load_test.py and scripts/replay.py
+in-process and against uvicorn.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from app import analyze_sentiment, analyze_sentiment_batch, app, HashedLinearModel
+import load_test
+import replay
+from tests.test_inference import REALISTIC_CORPUS, reference_analyze_sentiment
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAS_BENCHMARK = True
+except ImportError:
+    HAS_BENCHMARK = False
+
+requires_benchmark = pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+
+BATCH = [f"{text} #{i}" for i, text in enumerate(load_test.SAMPLE_TEXTS * 4)]
+
+
+@requires_benchmark
+class TestScoringBenchmarks:
+    """pytest-benchmark micro-benchmarks for the scoring hot path."""
+
+    @pytest.mark.benchmark
+    @pytest.mark.inference
+    def test_bench_analyze_sentiment(self, benchmark):
+        """Benchmark scoring a single short text."""
+        assert benchmark(analyze_sentiment, load_test.SAMPLE_TEXTS[0])[0] == "positive"
+
+    @pytest.mark.benchmark
+    @pytest.mark.inference
+    def test_bench_analyze_sentiment_long_text(self, benchmark):
+        """Benchmark scoring a text at the maximum accepted length."""
+        text = (" ".join(load_test.SAMPLE_TEXTS) * 3)[:app_module.MAX_TEXT_LENGTH]
+        benchmark(analyze_sentiment, text)
+
+    @pytest.mark.benchmark(group="lexicon-engine")
+    @pytest.mark.inference
+    def test_bench_reference_implementation(self, benchmark):
+        """Baseline: the original regex + set scorer over the realistic corpus."""
+        benchmark(lambda: [reference_analyze_sentiment(t) for t in REALISTIC_CORPUS])
+
+    @pytest.mark.benchmark(group="lexicon-engine")
+    @pytest.mark.inference
+    def test_bench_lexicon_engine(self, benchmark):
+        """Benchmark the precompiled engine over the same corpus as the reference."""
+        benchmark(lambda: [analyze_sentiment(t) for t in REALISTIC_CORPUS])
+
+    @pytest.mark.benchmark(group="batch-scoring")
+    @pytest.mark.inference
+    def test_bench_single_scoring_loop(self, benchmark):
+        """Baseline: scoring a batch one text at a time."""
+        assert len(benchmark(lambda: [analyze_sentiment(t) for t in BATCH])) == len(BATCH)
+
+    @pytest.mark.benchmark(group="batch-scoring")
+    @pytest.mark.inference
+    def test_bench_analyze_sentiment_batch(self, benchmark):
+        """Benchmark vectorized scoring of the same batch."""
+        assert len(benchmark(analyze_sentiment_batch, BATCH)) == len(BATCH)
+
+    @pytest.mark.benchmark
+    @pytest.mark.inference
+    def test_bench_linear_model_batch(self, benchmark):
+        """Benchmark the hashed linear backend on a batch."""
+        model = HashedLinearModel.from_lexicon(app_module.LEXICON)
+        assert len(benchmark(model.predict_batch, BATCH)) == len(BATCH)
+
+
+@requires_benchmark
+class TestResponseBenchmarks:
+    """pytest-benchmark comparison of default and fast JSON response serialization."""
+
+    @pytest.mark.benchmark(group="json-responses")
+    @pytest.mark.api
+    @pytest.mark.parametrize("fast_json", [False, True], ids=["default", "fast_json"])
+    @pytest.mark.parametrize("path, body", [
+        ("/predict", {"text": load_test.SAMPLE_TEXTS[0]}),
+        ("/predict/batch", {"texts": load_test.SAMPLE_TEXTS}),
+    ], ids=["predict", "predict_batch"])
+    def test_bench_json_responses(self, benchmark, monkeypatch, fast_json, path, body):
+        """Benchmark a request round trip with and without fast JSON responses."""
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0)
+        monkeypatch.setattr(app_module, "FAST_JSON_RESPONSES", fast_json)
+        monkeypatch.setattr(app_module.PREDICTION_CACHE, "max_size", 0)
+        with TestClient(app) as client:
+            response = benchmark(client.post, path, json=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+
+
+class TestLoadGeneratorStatistics:
+    """Tests for load generator result aggregation."""
+
+    @pytest.mark.unit
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between neighbouring samples."""
+        values = [1.0, 2.0, 3.0, 4.0]
+        assert load_test.percentile(values, 0) == 1.0
+        assert load_test.percentile(values, 50) == 2.5
+        assert load_test.percentile(values, 100) == 4.0
+
+    @pytest.mark.unit
+    def test_percentile_empty(self):
+        """Test percentile of no samples is zero."""
+        assert load_test.percentile([], 99) == 0.0
+
+    @pytest.mark.unit
+    def test_summarize_reports_latency_and_throughput(self):
+        """Test summary converts to milliseconds and counts errors in throughput."""
+        summary = load_test.summarize([0.001 * i for i in range(1, 101)], errors=4, elapsed=2.0)
+        assert summary["requests"] == 104
+        assert summary["errors"] == 4
+        assert summary["requests_per_second"] == 52.0
+        assert summary["latency_ms"]["p50"] == pytest.approx(50.5)
+        assert summary["latency_ms"]["p99"] == pytest.approx(99.01)
+        assert summary["latency_ms"]["max"] == pytest.approx(100.0)
+
+
+class TestLoadGenerator:
+    """Tests for driving the service with the load generator."""
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_run_load_test_in_process(self, monkeypatch):
+        """Test a report covers every endpoint with exact request counts and no errors."""
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0)
+        app_module.MODEL_REGISTRY.ensure_loaded()
+        report = asyncio.run(load_test.run_load_test(
+            "http://testserver", list(load_test.ENDPOINTS), concurrency=4,
+            total_requests=20, warmup=2, transport=httpx.ASGITransport(app=app)))
+
+        assert set(report["endpoints"]) == {"predict", "predict_batch", "metrics"}
+        for stats in report["endpoints"].values():
+            assert stats["requests"] == 20
+            assert stats["errors"] == 0
+            assert stats["requests_per_second"] > 0
+            assert 0 < stats["latency_ms"]["p50"] <= stats["latency_ms"]["p95"] <= stats["latency_ms"]["p99"]
+        json.dumps(report)
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_errors_are_counted(self):
+        """Test failed responses count as errors rather than latency samples."""
+        def handler(request):
+            return httpx.Response(503)
+
+        report = asyncio.run(load_test.run_load_test(
+            "http://testserver", ["metrics"], concurrency=2, total_requests=5,
+            transport=httpx.MockTransport(handler)))
+        stats = report["endpoints"]["metrics"]
+        assert stats["errors"] == 5
+        assert stats["error_rate"] == 1.0
+        assert stats["latency_ms"]["p50"] == 0.0
+
+    @pytest.mark.slow
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_cli_against_local_uvicorn(self, tmp_path, monkeypatch):
+        """Test the CLI starts uvicorn and writes a JSON report."""
+        monkeypatch.setenv("SIMULATED_LATENCY_SECONDS", "0")
+        output = tmp_path / "results.json"
+        exit_code = load_test.main(["--requests", "30", "--concurrency", "4", "--warmup", "5",
+                                    "--output", str(output)])
+
+        report = json.loads(output.read_text())
+        assert exit_code == 0
+        assert report["target"].startswith("http://127.0.0.1:")
+        assert report["endpoints"]["predict"]["requests"] == 30
+        assert report["endpoints"]["predict_batch"]["errors"] == 0
+
+    @pytest.mark.unit
+    def test_cli_rejects_unknown_endpoint(self):
+        """Test unknown endpoint names are a usage error."""
+        with pytest.raises(SystemExit):
+            load_test.main(["--endpoints", "predict,bogus", "--url", "http://localhost:1"])
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(
+        (record if isinstance(record, str) else json.dumps(record)) + "\n" for record in records))
+    return path
+
+
+class TestReplayParsing:
+    """Tests for reading recorded requests."""
+
+    @pytest.mark.unit
+    def test_parse_text_shorthand(self):
+        """Test text/label shorthand becomes a /predict request."""
+        request = replay.parse_record({"text": "great", "label": "positive"})
+        assert (request.method, request.path) == ("POST", "/predict")
+        assert request.body == {"text": "great"}
+        assert request.expected == "positive"
+
+    @pytest.mark.unit
+    def test_parse_texts_shorthand(self):
+        """Test texts shorthand becomes a /predict/batch request."""
+        request = replay.parse_record({"texts": ["a", "b"], "expected": ["neutral", "neutral"]})
+        assert request.path == "/predict/batch"
+
+    @pytest.mark.unit
+    def test_parse_timestamps(self):
+        """Test epoch, ISO 8601 and offset_ms send times."""
+        assert replay.parse_record({"text": "a", "offset_ms": 250}).offset == 0.25
+        assert replay.parse_record({"text": "a", "timestamp": 12.5}).offset == 12.5
+        iso = replay.parse_record({"text": "a", "timestamp": "2024-01-15T10:30:00Z"}).offset
+        assert iso == replay.parse_record({"text": "a", "timestamp": "2024-01-15T10:30:00+00:00"}).offset
+
+    @pytest.mark.unit
+    def test_unrecognized_lines_are_skipped(self, tmp_path):
+        """Test lines that are not requests are counted rather than sent."""
+        path = _write_jsonl(tmp_path / "traffic.jsonl", [
+            {"text": "good"}, {"request_id": "x", "title": "not traffic"}, "not json", "", [1, 2]])
+        stats = {"skipped": 0}
+        assert len(list(replay.read_records(path, stats))) == 1
+        assert stats["skipped"] == 3
+
+
+class TestReplay:
+    """Tests for replaying recorded traffic against the service."""
+
+    @pytest.fixture(autouse=True)
+    def loaded_model(self, monkeypatch):
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0)
+        app_module.MODEL_REGISTRY.ensure_loaded()
+
+    def _replay(self, tmp_path, records, **kwargs):
+        path = _write_jsonl(tmp_path / "traffic.jsonl", records)
+        return asyncio.run(replay.replay(
+            replay.read_records(path, {"skipped": 0}), "http://testserver",
+            transport=httpx.ASGITransport(app=app), **kwargs))
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_reports_label_match_rate(self, tmp_path):
+        """Test matches are counted per text across single and batch requests."""
+        report = self._replay(tmp_path, [
+            {"text": "great and wonderful", "label": "positive"},
+            {"text": "terrible and awful", "label": "positive"},
+            {"texts": ["good", "bad"], "expected": ["positive", "negative"]},
+            {"path": "/health", "method": "GET"},
+        ], concurrency=3)
+        assert report["requests"] == 4
+        assert report["errors"] == 0
+        assert report["labels"] == {"compared": 4, "matched": 3, "match_rate": 0.75}
+        assert report["status_codes"] == {"200": 4}
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_reports_errors(self, tmp_path):
+        """Test rejected requests count as errors and do not affect label matching."""
+        report = self._replay(tmp_path, [
+            {"text": "a" * 600, "label": "neutral"},
+            {"text": "fine", "label": "neutral"},
+        ])
+        assert report["errors"] == 1
+        assert report["error_rate"] == 0.5
+        assert report["status_codes"] == {"422": 1, "200": 1}
+        assert report["labels"]["compared"] == 1
+
+    @pytest.mark.api
+    @pytest.mark.integration
+    def test_original_mode_keeps_recorded_spacing(self, tmp_path):
+        """Test original-timing mode waits for recorded offsets, scaled by speed."""
+        records = [{"text": "good", "offset_ms": offset} for offset in (0, 100, 400)]
+        original = self._replay(tmp_path, records, mode="original", speed=2.0)
+        fast = self._replay(tmp_path, records, mode="max")
+        assert original["elapsed_seconds"] >= 0.2
+        assert fast["elapsed_seconds"] < 0.2
@@ -4,15 +4,26 @@ Tests dashboard endpoints, badge APIs, and helper functions.
 """
 import pytest
 import json
+import subprocess
+import threading
 
 # Import dashboard components
+import dashboard_server
 from dashboard_server import (
     app,
     is_pod_ready,
     get_deployment_stats,
     calculate_progress,
     deployment_state,
+    iter_json_stream,
+    Informer,
+    summarize_app,
+    summarize_pod,
+    list_pods,
+    DeploymentSnapshot,
+    SnapshotStore,
 )
+import dataclasses
 
 
 @pytest.fixture
@@ -26,10 +37,7 @@ def client():
 @pytest.fixture(autouse=True)
 def reset_state():
     """Reset deployment state before each test."""
-    deployment_state["argocd_apps"] = []
-    deployment_state["pods"] = []
-    deployment_state["progress"] = 0
-    deployment_state["phase"] = "Initializing"
+    deployment_state.publish(argocd_apps=[], pods=[], progress=0, phase="Initializing")
     yield
 
 
@@ -121,8 +129,7 @@ class TestCalculateProgress:
     @pytest.mark.dashboard
     def test_progress_no_apps(self):
         """Test progress with no apps returns 10."""
-        deployment_state["argocd_apps"] = []
-        deployment_state["pods"] = []
+        deployment_state.publish(argocd_apps=[], pods=[])
         progress = calculate_progress()
         assert progress == 10
 
@@ -130,8 +137,7 @@ class TestCalculateProgress:
     @pytest.mark.dashboard
     def test_progress_all_complete(self, mock_argocd_apps, mock_pods):
         """Test progress with all apps synced and healthy."""
-        deployment_state["argocd_apps"] = mock_argocd_apps
-        deployment_state["pods"] = mock_pods
+        deployment_state.publish(argocd_apps=mock_argocd_apps, pods=mock_pods)
         progress = calculate_progress()
         assert progress == 100
 
@@ -139,11 +145,10 @@ class TestCalculateProgress:
     @pytest.mark.dashboard
     def test_progress_partial(self):
         """Test progress with partial completion."""
-        deployment_state["argocd_apps"] = [
+        deployment_state.publish(argocd_apps=[
             {"name": "app1", "sync": "Synced", "health": "Healthy"},
             {"name": "app2", "sync": "OutOfSync", "health": "Progressing"},
-        ]
-        deployment_state["pods"] = []
+        ], pods=[])
         progress = calculate_progress()
         assert 0 < progress < 100
 
@@ -151,8 +156,7 @@ class TestCalculateProgress:
     @pytest.mark.dashboard
     def test_progress_max_100(self, mock_argocd_apps, mock_pods):
         """Test that progress never exceeds 100."""
-        deployment_state["argocd_apps"] = mock_argocd_apps
-        deployment_state["pods"] = mock_pods
+        deployment_state.publish(argocd_apps=mock_argocd_apps, pods=mock_pods)
         progress = calculate_progress()
         assert progress <= 100
 
@@ -308,7 +312,7 @@ class TestBadgeColors:
     @pytest.mark.dashboard
     def test_badge_argocd_no_apps_inactive(self, client):
         """Test ArgoCD badge shows inactive with no apps."""
-        deployment_state["argocd_apps"] = []
+        deployment_state.publish(argocd_apps=[])
         response = client.get("/api/badge/argocd")
         data = json.loads(response.data)
         assert data["color"] == "inactive"
@@ -317,7 +321,7 @@ class TestBadgeColors:
     @pytest.mark.dashboard
     def test_badge_argocd_all_synced_success(self, client, mock_argocd_apps):
         """Test ArgoCD badge shows success when all synced."""
-        deployment_state["argocd_apps"] = mock_argocd_apps
+        deployment_state.publish(argocd_apps=mock_argocd_apps)
         response = client.get("/api/badge/argocd")
         data = json.loads(response.data)
         assert data["color"] == "success"
@@ -326,9 +330,7 @@ class TestBadgeColors:
     @pytest.mark.dashboard
     def test_badge_deployment_complete_success(self, client, mock_argocd_apps, mock_pods):
         """Test Deployment badge shows success at 100%."""
-        deployment_state["argocd_apps"] = mock_argocd_apps
-        deployment_state["pods"] = mock_pods
-        deployment_state["progress"] = 100
+        deployment_state.publish(argocd_apps=mock_argocd_apps, pods=mock_pods, progress=100)
         response = client.get("/api/badge/deployment")
         data = json.loads(response.data)
         assert data["color"] == "success"
@@ -339,19 +341,19 @@ class TestBadgeColors:
     def test_badge_deployment_in_progress_colors(self, client):
         """Test Deployment badge color at different progress levels."""
         # Test blue color (0-30%)
-        deployment_state["progress"] = 25
+        deployment_state.publish(progress=25)
         response = client.get("/api/badge/deployment")
         data = json.loads(response.data)
         assert data["color"] == "blue"
 
         # Test orange color (30-70%)
-        deployment_state["progress"] = 50
+        deployment_state.publish(progress=50)
         response = client.get("/api/badge/deployment")
         data = json.loads(response.data)
         assert data["color"] == "orange"
 
         # Test yellow color (70-100%)
-        deployment_state["progress"] = 80
+        deployment_state.publish(progress=80)
         response = client.get("/api/badge/deployment")
         data = json.loads(response.data)
         assert data["color"] == "yellow"
@@ -374,3 +376,594 @@ class TestStreamEndpoint:
         """Test stream endpoint returns event-stream content type."""
         response = client.get("/api/stream")
         assert "text/event-stream" in response.content_type
+
+
+def make_pod(name, namespace="ml-inference", phase="Running", ready=(True,), resource_version="1"):
+    """Build a Kubernetes Pod object as returned by the API."""
+    return {
+        "metadata": {"name": name, "namespace": namespace, "resourceVersion": resource_version},
+        "status": {"phase": phase, "containerStatuses": [{"ready": r} for r in ready]},
+    }
+
+
+def make_app(name, sync="Synced", health="Healthy", resource_version="1"):
+    """Build an ArgoCD Application object as returned by the API."""
+    return {
+        "metadata": {"name": name, "namespace": "argocd", "resourceVersion": resource_version},
+        "status": {"sync": {"status": sync}, "health": {"status": health}},
+    }
+
+
+class FakeWatchProcess:
+    """Stands in for a kubectl watch subprocess with fixed output and exit code."""
+
+    def __init__(self, stdout="", stderr="", returncode=0):
+        self.stdout = iter([stdout])
+        self.error_output = stderr
+        self.returncode = None
+        self._exit_code = returncode
+        self.killed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wait()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = self._exit_code
+        return self.returncode
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+
+def fake_popen(process):
+    """Popen stand-in that writes process's error output to the stderr file it is given."""
+    def popen(args, stderr=None, **kwargs):
+        stderr.write(process.error_output.encode())
+        return process
+    return popen
+
+
+class TestJsonStream:
+    """Tests for decoding streamed watch output."""
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_documents_split_across_chunks(self):
+        """Test documents are yielded once complete, whatever the chunking."""
+        text = json.dumps({"type": "ADDED", "n": 1}) + "\n" + json.dumps({"type": "DELETED", "n": 2}, indent=2)
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        assert [doc["n"] for doc in iter_json_stream(chunks)] == [1, 2]
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_incomplete_trailing_document_dropped(self):
+        """Test a stream cut mid-document yields only complete documents."""
+        assert list(iter_json_stream(['{"a": 1}\n{"b": '])) == [{"a": 1}]
+
+
+class TestKubectlWatch:
+    """Tests for the kubectl watch subprocess wrapper."""
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_clean_exit_ends_stream(self, monkeypatch):
+        """Test events are yielded and a zero exit ends the watch quietly."""
+        event = {"type": "ADDED", "object": make_pod("api-1")}
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen",
+                            lambda args, **kwargs: FakeWatchProcess(json.dumps(event)))
+        assert list(dashboard_server.kubectl_watch("/api/v1/pods", "1")) == [event]
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_failed_watch_raises_with_stderr(self, monkeypatch):
+        """Test a non-zero kubectl exit is raised with its error output."""
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen", fake_popen(FakeWatchProcess(
+            stderr='Error from server (Forbidden): pods is forbidden\n', returncode=1)))
+        with pytest.raises(RuntimeError, match="exited with 1: Error from server \\(Forbidden\\)"):
+            list(dashboard_server.kubectl_watch("/api/v1/pods", "1"))
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_failed_watch_error_is_bounded(self, monkeypatch):
+        """Test only the tail of a long kubectl error output is kept."""
+        chatter = "".join(f"I0101 retrying request {i}\n" for i in range(2000))
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen", fake_popen(FakeWatchProcess(
+            stderr=chatter + "error: connection refused\n", returncode=1)))
+        with pytest.raises(RuntimeError) as raised:
+            list(dashboard_server.kubectl_watch("/api/v1/pods", "1"))
+        message = str(raised.value)
+        assert message.endswith("error: connection refused")
+        assert "retrying request 0\n" not in message
+        assert len(message) < dashboard_server.WATCH_STDERR_TAIL_BYTES + 100
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_closed_early_kills_process(self, monkeypatch):
+        """Test a watch abandoned mid-stream kills kubectl instead of raising."""
+        process = FakeWatchProcess(json.dumps({"type": "ADDED", "object": make_pod("api-1")}))
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen", lambda args, **kwargs: process)
+        events = dashboard_server.kubectl_watch("/api/v1/pods", "1")
+        next(events)
+        events.close()
+        assert process.killed
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_failed_watch_relists_with_backoff(self, monkeypatch):
+        """Test the informer treats a failed watch as a failure: it backs off and lists again."""
+        monkeypatch.setattr(dashboard_server, "WATCH_RETRY_SECONDS", 0)
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen", fake_popen(FakeWatchProcess(
+            stderr="The resourceVersion for the provided watch is too old.", returncode=1)))
+        stop = threading.Event()
+        # Failure state seen by each list call
+        lists = []
+
+        def list_fn():
+            lists.append((informer.failures, informer.last_error))
+            if len(lists) == 2:
+                stop.set()
+            return [make_pod("api-1")], "5"
+
+        informer = Informer("pods", list_fn,
+                            lambda rv: dashboard_server.kubectl_watch("/api/v1/pods", rv), summarize_pod)
+        informer.run(stop)
+        assert lists[0] == (0, None)
+        assert lists[1][0] == 1
+        assert "too old" in lists[1][1]
+
+
+class TestInformer:
+    """Tests for the list-then-watch informer against fake event streams."""
+
+    @staticmethod
+    def _informer(objects, streams, project=summarize_pod):
+        """Informer over a fixed list and a sequence of fake watch streams."""
+        calls = {"list": 0, "watch": [], "changes": 0}
+        streams = iter(streams)
+
+        def list_fn():
+            calls["list"] += 1
+            return objects, "100"
+
+        def watch_fn(resource_version):
+            calls["watch"].append(resource_version)
+            return next(streams)
+
+        def on_change():
+            calls["changes"] += 1
+
+        return Informer("pods", list_fn, watch_fn, project, on_change), calls
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_initial_list_filters_namespaces(self):
+        """Test the initial list keeps only pods in watched namespaces."""
+        informer, calls = self._informer(
+            [make_pod("api-1"), make_pod("other", namespace="kube-system"), make_pod("vm-0", "monitoring")],
+            [])
+        informer.resync()
+        assert [pod["name"] for pod in informer.items()] == ["api-1", "vm-0"]
+        assert informer.resource_version == "100"
+        assert calls["changes"] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_deltas_update_store(self):
+        """Test ADDED, MODIFIED and DELETED events are applied incrementally."""
+        informer, calls = self._informer([make_pod("api-1", phase="Pending", ready=(False,))], [])
+        informer.resync()
+
+        informer.apply({"type": "ADDED", "object": make_pod("api-2", resource_version="101")})
+        informer.apply({"type": "MODIFIED", "object": make_pod("api-1", resource_version="102")})
+        informer.apply({"type": "DELETED", "object": make_pod("api-2", resource_version="103")})
+
+        assert informer.items() == [
+            {"namespace": "ml-inference", "name": "api-1", "status": "Running", "ready": "1/1"}
+        ]
+        assert informer.resource_version == "103"
+        assert calls["changes"] == 4
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_irrelevant_events_do_not_notify(self):
+        """Test bookmarks, unchanged summaries and other namespaces do not trigger updates."""
+        informer, calls = self._informer([make_pod("api-1")], [])
+        informer.resync()
+        informer.apply({"type": "MODIFIED", "object": make_pod("api-1", resource_version="101")})
+        informer.apply({"type": "ADDED", "object": make_pod("dns", "kube-system", resource_version="102")})
+        informer.apply({"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "150"}}})
+        assert calls["changes"] == 1
+        assert informer.resource_version == "150"
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_run_resumes_watch_and_relists_on_expiry(self, monkeypatch):
+        """Test a finished watch resumes from the last version and 410 Gone forces a re-list."""
+        monkeypatch.setattr(dashboard_server, "WATCH_RETRY_SECONDS", 0)
+        stop = threading.Event()
+        expired = {"type": "ERROR", "object": {"kind": "Status", "code": 410, "message": "too old"}}
+
+        def final_stream():
+            stop.set()
+            yield {"type": "ADDED", "object": make_pod("late", resource_version="300")}
+
+        informer, calls = self._informer([make_pod("api-1")], [
+            iter([{"type": "ADDED", "object": make_pod("api-2", resource_version="200")}]),
+            iter([expired]),
+            final_stream(),
+        ])
+        informer.run(stop)
+
+        assert calls["watch"] == ["100", "200", "100"]
+        assert calls["list"] == 2
+        assert [pod["name"] for pod in informer.items()] == ["api-1"]
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_run_survives_list_failure(self, monkeypatch):
+        """Test a failing list is retried rather than killing the informer thread."""
+        monkeypatch.setattr(dashboard_server, "WATCH_RETRY_SECONDS", 0)
+        stop = threading.Event()
+        attempts = []
+
+        def list_fn():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("kubectl returned no output")
+            stop.set()
+            return [make_pod("api-1")], "5"
+
+        informer = Informer("pods", list_fn, lambda rv: iter(()), summarize_pod)
+        informer.run(stop)
+        assert len(attempts) == 2
+        assert informer.items()[0]["name"] == "api-1"
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_failures_back_off_and_reset(self, monkeypatch):
+        """Test consecutive failures double the retry delay up to the cap and success resets it."""
+        monkeypatch.setattr(dashboard_server, "WATCH_RETRY_SECONDS", 1)
+        monkeypatch.setattr(dashboard_server, "WATCH_MAX_BACKOFF_SECONDS", 5)
+        outcomes = [RuntimeError("timed out")] * 4 + [None]
+        stop = threading.Event()
+        delays = []
+
+        class RecordingStop:
+            is_set = stop.is_set
+
+            @staticmethod
+            def wait(seconds):
+                delays.append(seconds)
+
+        def list_fn():
+            outcome = outcomes.pop(0)
+            if outcome is not None:
+                raise outcome
+            stop.set()
+            return [make_pod("api-1")], "5"
+
+        informer = Informer("pods", list_fn, lambda rv: iter(()), summarize_pod)
+        informer.run(RecordingStop)
+
+        # The final delay follows the empty watch after recovery, back at the base interval
+        assert delays == [1, 2, 4, 5, 1]
+        assert informer.failures == 0
+        assert informer.last_error is None
+        assert informer.last_success is not None
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_status_tracks_last_success_and_error(self, monkeypatch):
+        """Test a source keeps its last success time while reporting the current failure."""
+        monkeypatch.setattr(dashboard_server, "WATCH_RETRY_SECONDS", 0)
+        informer, _ = self._informer([make_pod("api-1")], [])
+        assert informer.status() == {"last_success": None, "failures": 0, "last_error": None}
+        informer.resync()
+        synced_at = informer.status()["last_success"]
+
+        stop = threading.Event()
+
+        def list_fn():
+            stop.set()
+            raise RuntimeError("connection refused")
+
+        informer.list_fn = list_fn
+        informer.run(stop)
+        assert informer.status() == {"last_success": synced_at, "failures": 1,
+                                     "last_error": "connection refused"}
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_informer_changes_reach_api(self, client, monkeypatch):
+        """Test watch events flow through refresh_state into /api/status."""
+        apps, _ = self._informer([make_app("ml-inference"), make_app("monitoring")], [],
+                                 project=summarize_app)
+        pods, _ = self._informer([make_pod("api-1", phase="Pending", ready=(False,))], [])
+        apps.on_change = pods.on_change = dashboard_server.refresh_state
+        monkeypatch.setattr(dashboard_server, "APP_INFORMER", apps)
+        monkeypatch.setattr(dashboard_server, "POD_INFORMERS", [pods])
+        apps.resync()
+        pods.resync()
+        assert json.loads(client.get("/api/status").data)["phase"].startswith("Starting Pods")
+
+        pods.apply({"type": "MODIFIED", "object": make_pod("api-1", resource_version="2")})
+        data = json.loads(client.get("/api/status").data)
+        assert data["progress"] == 100
+        assert data["phase"] == "Deployment Complete"
+        assert [app["name"] for app in data["argocd_apps"]] == ["ml-inference", "monitoring"]
+        assert set(data["sources"]) == {"pods"}
+        assert data["sources"]["pods"]["last_success"] is not None
+
+
+class TestPodQueries:
+    """Tests for namespace-scoped, projected pod queries."""
+
+    # kubectl's client-side List has no resourceVersion; it comes from the server list
+    PROJECTED = ('List\n{ns}\tapi-1\tRunning\ttrue true\n'
+                 '{ns}\tapi-2\tPending\tfalse\n{ns}\tjob-1\tSucceeded\t\n')
+    SERVER_LIST = json.dumps({"kind": "PodList", "apiVersion": "v1",
+                              "metadata": {"resourceVersion": "4321", "continue": "abc"},
+                              "items": [make_pod("api-1")]})
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_list_pods_parses_projection(self, monkeypatch):
+        """Test the jsonpath projection is parsed into summarizable pods."""
+        commands = []
+
+        def run_command(cmd, timeout=5):
+            commands.append(cmd)
+            if isinstance(cmd, str):
+                return self.SERVER_LIST
+            return self.PROJECTED.format(ns="ml-inference")
+
+        monkeypatch.setattr(dashboard_server, "run_command", run_command)
+        items, resource_version = list_pods("ml-inference")
+
+        assert resource_version == "4321"
+        assert [summarize_pod(item) for item in items] == [
+            {"namespace": "ml-inference", "name": "api-1", "status": "Running", "ready": "2/2"},
+            {"namespace": "ml-inference", "name": "api-2", "status": "Pending", "ready": "0/1"},
+            {"namespace": "ml-inference", "name": "job-1", "status": "Succeeded", "ready": "0/0"},
+        ]
+        # The resourceVersion is listed before the pods, so a watch from it cannot miss changes
+        assert commands[0] == "kubectl get --raw /api/v1/namespaces/ml-inference/pods?limit=1"
+        assert commands[1][:5] == ["kubectl", "get", "pods", "-n", "ml-inference"]
+        assert "-A" not in commands[1]
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_list_pods_empty_namespace(self, monkeypatch):
+        """Test a namespace without pods lists as empty rather than failing."""
+        monkeypatch.setattr(dashboard_server, "run_command",
+                            lambda cmd, timeout=5: self.SERVER_LIST if isinstance(cmd, str) else "List")
+        assert list_pods("monitoring") == ([], "4321")
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_list_pods_fails_without_output(self, monkeypatch):
+        """Test a failed projection raises instead of reporting no pods."""
+        monkeypatch.setattr(dashboard_server, "run_command",
+                            lambda cmd, timeout=5: self.SERVER_LIST if isinstance(cmd, str) else "")
+        with pytest.raises(RuntimeError, match="no output for pods in monitoring"):
+            list_pods("monitoring")
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_list_pods_exact_argv(self, monkeypatch):
+        """Test kubectl receives the projection and selectors as single arguments, spaces included."""
+        monkeypatch.setattr(dashboard_server, "POD_LABEL_SELECTOR", "app in (ml-inference, monitoring)")
+        monkeypatch.setattr(dashboard_server, "POD_FIELD_SELECTOR", "status.phase!=Succeeded")
+        calls = []
+
+        def run(argv, **kwargs):
+            calls.append((argv, kwargs["timeout"]))
+            stdout = self.SERVER_LIST if "--raw" in argv else "List\n"
+            return subprocess.CompletedProcess(argv, 0, stdout=stdout, stderr="")
+
+        monkeypatch.setattr(dashboard_server.subprocess, "run", run)
+        assert list_pods("monitoring") == ([], "4321")
+        assert calls == [([
+            "kubectl", "get", "--raw",
+            "/api/v1/namespaces/monitoring/pods?labelSelector=app+in+%28ml-inference%2C+monitoring%29"
+            "&fieldSelector=status.phase%21%3DSucceeded&limit=1",
+        ], dashboard_server.PODS_TIMEOUT_SECONDS), ([
+            "kubectl", "get", "pods", "-n", "monitoring",
+            "-l", "app in (ml-inference, monitoring)",
+            "--field-selector", "status.phase!=Succeeded",
+            "-o", "jsonpath=" + dashboard_server.POD_PROJECTION,
+        ], dashboard_server.PODS_TIMEOUT_SECONDS)]
+        assert "{range .items[*]}" in dashboard_server.POD_PROJECTION
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_selectors_pushed_to_watch(self, monkeypatch):
+        """Test label and field selectors are passed to the API server in the watch URL."""
+        monkeypatch.setattr(dashboard_server, "POD_LABEL_SELECTOR", "app=ml-inference")
+        monkeypatch.setattr(dashboard_server, "POD_FIELD_SELECTOR", "status.phase!=Succeeded")
+
+        popen_args = []
+
+        monkeypatch.setattr(dashboard_server.subprocess, "Popen",
+                            lambda args, **kwargs: popen_args.append(args) or FakeWatchProcess())
+        list(dashboard_server.watch_pods("monitoring", "7"))
+        url = popen_args[0][-1]
+        assert url.startswith("/api/v1/namespaces/monitoring/pods?")
+        assert "labelSelector=app%3Dml-inference" in url
+        assert "fieldSelector=status.phase%21%3DSucceeded" in url
+        assert "resourceVersion=7" in url
+
+
+class TestSnapshotStore:
+    """Tests for the versioned deployment snapshot store."""
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_publish_swaps_in_new_version(self, mock_pods):
+        """Test publishing creates a new snapshot and leaves the previous one untouched."""
+        store = SnapshotStore(DeploymentSnapshot(version=0, start_time=1.0))
+        before = store.current()
+        after = store.publish(pods=mock_pods, progress=50)
+
+        assert store.current() is after
+        assert after.version == 1
+        assert after.pods == tuple(mock_pods)
+        assert after.start_time == 1.0
+        assert before.pods == () and before.progress == 0
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_snapshot_is_frozen(self):
+        """Test a published snapshot cannot be modified in place."""
+        snapshot = SnapshotStore(DeploymentSnapshot(version=0, start_time=1.0)).publish(progress=10)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.progress = 20
+        with pytest.raises(AttributeError):
+            snapshot.pods.append({})
+
+    @pytest.mark.unit
+    @pytest.mark.dashboard
+    def test_wait_for_change_wakes_on_publish(self):
+        """Test waiters receive the next version when it is published and time out otherwise."""
+        store = SnapshotStore(DeploymentSnapshot(version=0, start_time=1.0))
+        assert store.wait_for_change(0, timeout=0.01).version == 0
+
+        timer = threading.Timer(0.05, store.publish, kwargs={"progress": 40})
+        timer.start()
+        snapshot = store.wait_for_change(0, timeout=5)
+        timer.join()
+        assert (snapshot.version, snapshot.progress) == (1, 40)
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_status_reports_version(self, client, mock_argocd_apps):
+        """Test /api/status serves one snapshot, including its version."""
+        published = deployment_state.publish(argocd_apps=mock_argocd_apps, progress=70)
+        data = json.loads(client.get("/api/status").data)
+        assert data["version"] == published.version
+        assert data["progress"] == 70
+        assert len(data["argocd_apps"]) == len(mock_argocd_apps)
+
+
+class TestCachedResponses:
+    """Tests for pre-serialized snapshot responses and conditional requests."""
+
+    ENDPOINTS = ["/api/status", "/api/debug", "/api/badge/argocd", "/api/badge/pods",
+                 "/api/badge/health", "/api/badge/deployment"]
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_rendered_once_per_version(self, client, monkeypatch, mock_argocd_apps, mock_pods):
+        """Test stats and bodies are computed once per version, whatever the request count."""
+        calls = []
+        real_stats = dashboard_server.get_deployment_stats
+
+        def counting_stats(apps, pods):
+            calls.append(1)
+            return real_stats(apps, pods)
+
+        monkeypatch.setattr(dashboard_server, "get_deployment_stats", counting_stats)
+        deployment_state.publish(argocd_apps=mock_argocd_apps, pods=mock_pods)
+        for _ in range(3):
+            for endpoint in self.ENDPOINTS:
+                assert client.get(endpoint).status_code == 200
+        assert len(calls) == 1
+
+        deployment_state.publish(progress=50)
+        client.get("/api/badge/deployment")
+        assert len(calls) == 2
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_if_none_match_returns_304(self, client, mock_argocd_apps):
+        """Test a matching ETag is answered with an empty 304."""
+        deployment_state.publish(argocd_apps=mock_argocd_apps)
+        for endpoint in ["/api/debug", "/api/badge/argocd", "/api/badge/deployment"]:
+            first = client.get(endpoint)
+            etag = first.headers["ETag"]
+            assert first.headers["Cache-Control"] == "no-cache"
+
+            cached = client.get(endpoint, headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert cached.data == b""
+            assert client.get(endpoint, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_etag_follows_content(self, client, mock_argocd_apps):
+        """Test a new version changes affected ETags while unchanged badges stay cacheable."""
+        deployment_state.publish(argocd_apps=mock_argocd_apps, progress=40)
+        argocd_etag = client.get("/api/badge/argocd").headers["ETag"]
+        deployment_etag = client.get("/api/badge/deployment").headers["ETag"]
+
+        deployment_state.publish(progress=80)
+        assert client.get("/api/badge/argocd", headers={"If-None-Match": argocd_etag}).status_code == 304
+        response = client.get("/api/badge/deployment", headers={"If-None-Match": deployment_etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)["message"] == "80%"
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_status_combines_cached_and_live_fields(self, client, mock_pods):
+        """Test /api/status adds per-request fields to the cached snapshot body."""
+        published = deployment_state.publish(pods=mock_pods, phase="Waiting for Ready")
+        response = client.get("/api/status")
+        data = json.loads(response.data)
+        assert data["version"] == published.version
+        assert data["phase"] == "Waiting for Ready"
+        assert len(data["pods"]) == len(mock_pods)
+        assert {"elapsed", "base_domain", "sources"} <= set(data)
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_status_etag_ignores_elapsed(self, client, monkeypatch, mock_pods):
+        """Test /api/status revalidates to 304 while only elapsed time moves, until a new version."""
+        deployment_state.publish(pods=mock_pods)
+        clock = [deployment_state.current().start_time + 10]
+        monkeypatch.setattr(dashboard_server.time, "time", lambda: clock[0])
+        # The module's informers run against a missing kubectl; keep their status fixed
+        monkeypatch.setattr(dashboard_server, "source_status",
+                            lambda: {"pods/ml-inference": {"last_success": 1.0, "failures": 0,
+                                                           "last_error": None}})
+        first = client.get("/api/status")
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        clock[0] += 5
+        assert client.get("/api/status", headers={"If-None-Match": etag}).status_code == 304
+        response = client.get("/api/status")
+        assert response.headers["ETag"] == etag
+        assert json.loads(response.data)["elapsed"] == json.loads(first.data)["elapsed"] + 5
+
+        deployment_state.publish(progress=90)
+        response = client.get("/api/status", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)["progress"] == 90
+
+    @pytest.mark.integration
+    @pytest.mark.dashboard
+    def test_status_etag_follows_sources(self, client, monkeypatch):
+        """Test a source failing or recovering changes the /api/status ETag without a new version."""
+        sources = {"pods/ml-inference": {"last_success": 1.0, "failures": 0, "last_error": None}}
+        monkeypatch.setattr(dashboard_server, "source_status", lambda: sources)
+        etag = client.get("/api/status").headers["ETag"]
+        assert client.get("/api/status", headers={"If-None-Match": etag}).status_code == 304
+
+        sources["pods/ml-inference"] = {"last_success": 1.0, "failures": 1, "last_error": "connection refused"}
+        response = client.get("/api/status", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)["sources"]["pods/ml-inference"]["last_error"] == "connection refused"
+        failed_etag = response.headers["ETag"]
+
+        sources["pods/ml-inference"] = {"last_success": 2.0, "failures": 0, "last_error": None}
+        response = client.get("/api/status", headers={"If-None-Match": failed_etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)["sources"]["pods/ml-inference"]["failures"] == 0
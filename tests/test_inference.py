@@ -2,10 +2,89 @@
 Unit tests for ML inference sentiment analysis.
 Tests the core analyze_sentiment function and related logic.
 """
+import asyncio
+import os
+import re
+import time
+
+import numpy as np
 import pytest
 
 # Import the sentiment analysis function and word sets
-from app import analyze_sentiment, POSITIVE_WORDS, NEGATIVE_WORDS
+import app as app_module
+from app import (
+    analyze_sentiment,
+    analyze_sentiment_batch,
+    load_model,
+    CompiledLexicon,
+    HashedLinearModel,
+    LexiconModel,
+    MicroBatcher,
+    ModelRegistry,
+    PredictionCache,
+    SentimentModel,
+    StageTimer,
+    LEXICON,
+    POSITIVE_WORDS,
+    NEGATIVE_WORDS,
+)
+
+
+def reference_analyze_sentiment(text: str) -> tuple:
+    """Original regex + set intersection implementation, kept as the oracle."""
+    words = set(re.findall(r'\b[a-z]+\b', text.lower()))
+    positive_count = len(words & POSITIVE_WORDS)
+    negative_count = len(words & NEGATIVE_WORDS)
+    if positive_count > negative_count:
+        sentiment = "positive"
+        confidence = min(0.95, 0.6 + (positive_count * 0.1))
+    elif negative_count > positive_count:
+        sentiment = "negative"
+        confidence = min(0.95, 0.6 + (negative_count * 0.1))
+    else:
+        sentiment = "neutral"
+        confidence = 0.5 + (len(words) * 0.01)
+    return sentiment, round(min(confidence, 0.95), 2)
+
+
+REALISTIC_CORPUS = [
+    "This GitOps demo is amazing!",
+    "Terrible experience, I hate this poor quality product",
+    "The weather is cloudy today",
+    "This product is excellent and I love using it every day",
+    "Great great GREAT, but the checkout was frustrating.",
+    "Deployment 42 finished in 3m12s with status=OK",
+    "good_bad good2 bad-ish well-made awful!!!",
+    "Support was helpful; delivery was slow, packaging was fine.",
+    "Café service was superb — the staff were lovely",
+    "Order #A-1029 shipped. Tracking: 1Z999AA10123456784",
+    "I can't say it was the worst, but it wasn't the best either",
+    "Meh.",
+    "\tAmazing\nwonderful\r\nfantastic\x0bperfect\x0cbrilliant",
+    "The \u212aelvin-scaled sensor reported miserable readings",
+    "disappointed disappointing DISAPPOINTED sad angry useless",
+    "The new release is a big improvement over the previous version. "
+    "Startup is faster, the dashboard is responsive, and the docs are "
+    "clear. A few rough edges remain, but overall it's impressive work.",
+]
+
+
+class TestLexiconEngine:
+    """Tests that the precompiled lexicon engine matches the original scorer."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_lexicon_merges_word_sets(self):
+        """Test the merged table covers both word sets with correct polarity."""
+        assert {w for w, polarity in LEXICON.items() if polarity > 0} == POSITIVE_WORDS
+        assert {w for w, polarity in LEXICON.items() if polarity < 0} == NEGATIVE_WORDS
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    @pytest.mark.parametrize("text", REALISTIC_CORPUS)
+    def test_matches_reference_implementation(self, text):
+        """Test results are identical to the regex + set implementation."""
+        assert analyze_sentiment(text) == reference_analyze_sentiment(text)
 
 
 class TestAnalyzeSentiment:
@@ -92,6 +171,426 @@ class TestAnalyzeSentiment:
         assert isinstance(confidence, float)
 
 
+class TestBatchScoring:
+    """Tests for the vectorized analyze_sentiment_batch function."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_batch_matches_single_scoring(self):
+        """Test batch results equal per-text analyze_sentiment results."""
+        assert analyze_sentiment_batch(REALISTIC_CORPUS) == [
+            analyze_sentiment(text) for text in REALISTIC_CORPUS
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_batch_empty_list(self):
+        """Test empty input returns an empty result list."""
+        assert analyze_sentiment_batch([]) == []
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_batch_repeated_words_count_once(self):
+        """Test repeated words in one text are counted once, as in single scoring."""
+        results = analyze_sentiment_batch(["good good great bad bad", "amazing", ""])
+        assert results == [("positive", 0.8), ("positive", 0.7), ("neutral", 0.5)]
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_batch_separator_byte_in_text(self):
+        """Test NUL bytes in input do not split a text into two documents."""
+        texts = ["terrible\x00awful", "great"]
+        assert analyze_sentiment_batch(texts) == [analyze_sentiment(t) for t in texts]
+
+
+class TestModelBackends:
+    """Tests for the pluggable sentiment model backends."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_incomplete_backend_fails_at_construction(self):
+        """Test a backend without predict_batch cannot be instantiated."""
+        class Incomplete(SentimentModel):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_lexicon_model_matches_analyze_sentiment(self):
+        """Test the lexicon backend wraps the rule-based scorer."""
+        model = LexiconModel()
+        assert model.predict_batch(REALISTIC_CORPUS) == [
+            analyze_sentiment(text) for text in REALISTIC_CORPUS
+        ]
+        assert model.predict("This is amazing") == analyze_sentiment("This is amazing")
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_features_independent_of_charset(self):
+        """Test a non-ASCII character elsewhere in the text does not change the hashed tokens."""
+        model = HashedLinearModel.from_lexicon({"deploy42": 1, "good_bad": 1, "shipped": 1})
+        ascii_texts = ["deploy42 shipped", "good_bad deploy42", "Deploy42 shipped, great_2"]
+        non_ascii_texts = [f"{text} é" for text in ascii_texts]
+        np.testing.assert_array_equal(model.probabilities(ascii_texts),
+                                      model.probabilities(non_ascii_texts))
+        assert model.predict_batch(["deploy42 shipped", "deploy42 shipped é"]) == [("positive", 0.88)] * 2
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_polarity(self):
+        """Test a lexicon-seeded linear model separates clear cases."""
+        model = HashedLinearModel.from_lexicon(LEXICON)
+        results = model.predict_batch(["amazing wonderful", "terrible awful", "cloudy"])
+        assert [sentiment for sentiment, _ in results] == ["positive", "negative", "neutral"]
+        assert all(0 <= confidence <= 1 for _, confidence in results)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_batch_matches_single(self):
+        """Test batch scoring equals per-text scoring."""
+        model = HashedLinearModel.from_lexicon(LEXICON)
+        assert model.predict_batch(REALISTIC_CORPUS) == [model.predict(t) for t in REALISTIC_CORPUS]
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_npz_round_trip(self, tmp_path):
+        """Test weights saved to .npz load back into an identical model."""
+        path = tmp_path / "model.npz"
+        HashedLinearModel(np.arange(8, dtype=np.float32) - 4, bias=0.25, neutral_margin=0.05).save(path)
+        model = load_model("linear", str(path))
+        assert isinstance(model, HashedLinearModel)
+        assert model.weights.tolist() == list(range(-4, 4))
+        assert model.bias == 0.25
+        assert model.neutral_margin == pytest.approx(0.05)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_memory_mapped_artifact(self, tmp_path):
+        """Test a directory artifact loads with memory-mapped weights."""
+        seeded = HashedLinearModel.from_lexicon(LEXICON)
+        seeded.save(str(tmp_path / "linear"))
+        model = load_model("linear", str(tmp_path / "linear"))
+        assert isinstance(model.weights, np.memmap)
+        assert model.predict_batch(REALISTIC_CORPUS) == seeded.predict_batch(REALISTIC_CORPUS)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_lexicon_artifact_round_trip(self, tmp_path):
+        """Test a saved lexicon artifact scores like the built-in lexicon."""
+        LexiconModel().save(str(tmp_path / "lexicon"))
+        model = load_model("lexicon", str(tmp_path / "lexicon"))
+        assert model.lexicon.lexicon == LEXICON
+        assert model.predict_batch(REALISTIC_CORPUS) == analyze_sentiment_batch(REALISTIC_CORPUS)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_custom_lexicon_artifact(self, tmp_path):
+        """Test a lexicon artifact with different words changes predictions."""
+        custom = LexiconModel(CompiledLexicon({"gitops": 1, "outage": -1}))
+        custom.save(str(tmp_path / "custom"))
+        model = load_model("lexicon", str(tmp_path / "custom"))
+        assert model.predict("gitops rocks")[0] == "positive"
+        assert model.predict("another outage")[0] == "negative"
+        assert model.predict("amazing")[0] == "neutral"
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_backend_requires_path(self):
+        """Test the linear backend refuses to start without weights."""
+        with pytest.raises(ValueError):
+            load_model("linear", "")
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_linear_model_empty_batch(self):
+        """Test empty input returns an empty result list."""
+        assert HashedLinearModel.from_lexicon(LEXICON).predict_batch([]) == []
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_unknown_backend_rejected(self):
+        """Test an unknown backend name raises ValueError."""
+        with pytest.raises(ValueError):
+            load_model("transformer")
+
+
+def _write_lexicon(path, lexicon, version=None):
+    """Write a lexicon artifact directory, optionally with a VERSION file."""
+    LexiconModel(CompiledLexicon(lexicon)).save(str(path))
+    if version is not None:
+        (path / "VERSION").write_text(version)
+    return path
+
+
+class TestModelRegistry:
+    """Tests for model versioning and hot reload."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_builtin_model_version(self):
+        """Test the built-in lexicon is served as version 'builtin'."""
+        registry = ModelRegistry("lexicon", "", reload_interval=0)
+        model, version = registry.ensure_loaded()
+        assert isinstance(model, LexiconModel)
+        assert version == "builtin"
+        assert registry.check_for_update() is False
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_reload_swaps_version(self, tmp_path):
+        """Test a changed artifact is loaded and swapped in atomically."""
+        artifact = _write_lexicon(tmp_path / "lexicon", {"gitops": 1}, version="v1")
+        registry = ModelRegistry("lexicon", str(artifact), reload_interval=0)
+        old_model, old_version = registry.ensure_loaded()
+        assert old_version == "v1"
+        assert registry.check_for_update() is False
+
+        _write_lexicon(artifact, {"gitops": -1}, version="v2")
+        assert registry.check_for_update() is True
+        new_model, new_version = registry.active
+        assert new_version == "v2"
+        assert new_model.predict("gitops")[0] == "negative"
+        # A request that captured the old pair keeps scoring with it
+        assert old_model.predict("gitops")[0] == "positive"
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_configmap_symlink_swap(self, tmp_path):
+        """Test ConfigMap-style ..data symlink swaps are followed."""
+        mount = tmp_path / "mount"
+        mount.mkdir()
+        _write_lexicon(tmp_path / "rev1", {"gitops": 1}, version="rev1")
+        _write_lexicon(tmp_path / "rev2", {"gitops": -1}, version="rev2")
+        (mount / "..data").symlink_to(tmp_path / "rev1")
+        registry = ModelRegistry("lexicon", str(mount), reload_interval=0)
+        assert registry.ensure_loaded()[1] == "rev1"
+
+        (mount / "..data_tmp").symlink_to(tmp_path / "rev2")
+        os.replace(mount / "..data_tmp", mount / "..data")
+        assert registry.check_for_update() is True
+        assert registry.active[1] == "rev2"
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_version_digest_without_version_file(self, tmp_path):
+        """Test artifacts without a VERSION file get a content digest version."""
+        artifact = _write_lexicon(tmp_path / "lexicon", {"gitops": 1})
+        registry = ModelRegistry("lexicon", str(artifact), reload_interval=0)
+        version = registry.ensure_loaded()[1]
+        assert len(version) == 12
+        _write_lexicon(artifact, {"gitops": 1, "outage": -1})
+        assert registry.check_for_update() is True
+        assert registry.active[1] != version
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_failed_reload_keeps_current_version(self, tmp_path):
+        """Test a broken artifact leaves the current version active."""
+        artifact = _write_lexicon(tmp_path / "lexicon", {"gitops": 1}, version="v1")
+        registry = ModelRegistry("lexicon", str(artifact), reload_interval=0)
+        registry.ensure_loaded()
+        (artifact / "words.npy").write_bytes(b"corrupt")
+        (artifact / "VERSION").write_text("v2")
+        assert registry.check_for_update() is False
+        assert registry.active[1] == "v1"
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_failed_first_load_is_retried(self, tmp_path):
+        """Test a broken first artifact is reported and retried until it loads."""
+        artifact = _write_lexicon(tmp_path / "lexicon", {"gitops": 1}, version="v1")
+        (artifact / "words.npy").write_bytes(b"corrupt")
+        registry = ModelRegistry("lexicon", str(artifact), reload_interval=0)
+        with pytest.raises(Exception):
+            registry.ensure_loaded()
+        assert registry.active is None
+        assert registry.load_error
+        # The same broken artifact is tried again rather than skipped
+        assert registry.check_for_update() is False
+        assert registry.load_error
+
+        _write_lexicon(artifact, {"gitops": 1}, version="v1")
+        assert registry.check_for_update() is True
+        assert registry.active[1] == "v1"
+        assert registry.load_error is None
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_watcher_picks_up_new_version(self, tmp_path):
+        """Test the background watcher activates a new version without a request."""
+        artifact = _write_lexicon(tmp_path / "lexicon", {"gitops": 1}, version="v1")
+        registry = ModelRegistry("lexicon", str(artifact), reload_interval=0.01)
+        registry.ensure_loaded()
+        registry.start_watching()
+        try:
+            _write_lexicon(artifact, {"gitops": -1}, version="v2")
+            deadline = time.monotonic() + 5
+            while registry.active[1] != "v2" and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert registry.active[1] == "v2"
+        finally:
+            registry.stop_watching()
+
+
+class TestPredictionCache:
+    """Tests for the LRU prediction cache."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_cache_hit_after_put(self):
+        """Test a stored result is returned for the same text."""
+        cache = PredictionCache(max_size=4)
+        cache.put("amazing", ("positive", 0.7))
+        assert cache.get("amazing") == ("positive", 0.7)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_cache_key_is_normalized(self):
+        """Test case and surrounding whitespace do not affect the key."""
+        cache = PredictionCache(max_size=4)
+        cache.put("  Amazing ", ("positive", 0.7))
+        assert cache.get("AMAZING") == ("positive", 0.7)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_cache_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = PredictionCache(max_size=2)
+        cache.put("a", ("neutral", 0.51))
+        cache.put("b", ("neutral", 0.51))
+        cache.get("a")
+        cache.put("c", ("neutral", 0.51))
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_cache_ttl_expiry(self):
+        """Test entries expire after the TTL."""
+        cache = PredictionCache(max_size=4, ttl_seconds=0.01)
+        cache.put("good", ("positive", 0.7))
+        time.sleep(0.02)
+        assert cache.get("good") is None
+        assert len(cache) == 0
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_cache_disabled_with_zero_size(self):
+        """Test a zero-size cache stores nothing."""
+        cache = PredictionCache(max_size=0)
+        cache.put("good", ("positive", 0.7))
+        assert cache.get("good") is None
+
+
+class TestMicroBatcher:
+    """Tests for coalescing concurrent predictions into micro-batches."""
+
+    @staticmethod
+    def _run(batcher, texts, monkeypatch):
+        """Submit texts concurrently and record the batch sizes scored."""
+        batch_sizes = []
+
+        def recording_batch(batch, *args):
+            batch_sizes.append(len(batch))
+            return analyze_sentiment_batch(batch, *args)
+
+        monkeypatch.setattr(app_module, "analyze_sentiment_batch", recording_batch)
+        monkeypatch.setattr(app_module, "SIMULATED_LATENCY_SECONDS", 0)
+
+        async def submit_all():
+            model = LexiconModel()
+            return await asyncio.gather(*[batcher.submit(t, model) for t in texts])
+
+        return asyncio.run(submit_all()), batch_sizes
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_flushes_at_max_batch_size(self, monkeypatch):
+        """Test batches are cut at max_batch_size."""
+        batcher = MicroBatcher(max_batch_size=2, max_wait_seconds=1.0)
+        texts = ["good", "bad", "lovely", "awful", "cloudy"]
+        results, batch_sizes = self._run(batcher, texts, monkeypatch)
+        assert results == [analyze_sentiment(t) for t in texts]
+        assert batch_sizes[:2] == [2, 2]
+        assert sum(batch_sizes) == 5
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_flushes_after_max_wait(self, monkeypatch):
+        """Test a partial batch is flushed once the wait time expires."""
+        batcher = MicroBatcher(max_batch_size=100, max_wait_seconds=0.005)
+        texts = ["good", "bad", "lovely"]
+        results, batch_sizes = self._run(batcher, texts, monkeypatch)
+        assert results == [analyze_sentiment(t) for t in texts]
+        assert batch_sizes == [3]
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_scoring_error_propagates_to_callers(self, monkeypatch):
+        """Test every caller in a failed batch receives the exception."""
+        def failing_batch(batch, *args):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(app_module, "analyze_sentiment_batch", failing_batch)
+        batcher = MicroBatcher(max_batch_size=2, max_wait_seconds=0.005)
+
+        async def submit_all():
+            model = LexiconModel()
+            return await asyncio.gather(
+                batcher.submit("good", model), batcher.submit("bad", model), return_exceptions=True)
+
+        results = asyncio.run(submit_all())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestStageTimer:
+    """Tests for per-request stage timing."""
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_laps_are_consecutive(self):
+        """Test each lap covers the time since the previous one."""
+        timer = StageTimer()
+        time.sleep(0.01)
+        timer.lap("parse")
+        timer.lap("cache")
+        assert timer.stages["parse"] >= 0.01
+        assert timer.stages["cache"] < timer.stages["parse"]
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_exclude_moves_time_to_another_stage(self):
+        """Test time measured in a worker can be split out of a lap."""
+        timer = StageTimer()
+        time.sleep(0.02)
+        timer.lap("queue", exclude=0.015)
+        timer.add("score", 0.015)
+        assert timer.stages["queue"] == pytest.approx(0.005, abs=0.01)
+        assert timer.stages["queue"] + timer.stages["score"] >= 0.02
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_repeated_stage_accumulates(self):
+        """Test lapping the same stage twice adds up."""
+        timer = StageTimer()
+        timer.add("score", 0.001)
+        timer.add("score", 0.002)
+        assert timer.stages["score"] == pytest.approx(0.003)
+
+    @pytest.mark.unit
+    @pytest.mark.inference
+    def test_server_timing_format(self):
+        """Test the header lists stages in order with millisecond durations."""
+        timer = StageTimer()
+        timer.add("parse", 0.0012)
+        timer.add("score", 0.5)
+        header = timer.server_timing()
+        assert header.startswith("parse;dur=1.200, score;dur=500.000, total;dur=")
+
+
 class TestSentimentEdgeCases:
     """Edge case tests for sentiment analysis."""
 